@@ -6,43 +6,83 @@ Model Context Protocol server for CodeTree - enables any MCP-compatible
 AI assistant (Claude Desktop, etc.) to query code repositories.
 """
 
+import io
 import json
+import re
 import sys
 import asyncio
+import weakref
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
 from typing import Any, Optional
+from urllib.parse import unquote, urlparse
+
+# orjson is an optional speedup: C encoder/decoder working on bytes directly
+try:
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+# Stdin buffer limit; a whole header block must fit in it
+READ_BUFFER_LIMIT = 1 << 20
+
+_CONTENT_LENGTH_RE = re.compile(rb"Content-Length:\s*(\d+)", re.IGNORECASE)
+
 
 # MCP Protocol Implementation
 class MCPServer:
     """Simple MCP Server implementation for CodeTree."""
     
     def __init__(self):
-        self.codetree_instances = {}  # repo_path -> CodeTree instance
+        # repo_path -> CodeTree instance, least recently used first
+        self.codetree_instances: OrderedDict[str, Any] = OrderedDict()
+        # Instances evicted from the LRU that something else still references
+        self._evicted_instances = weakref.WeakValueDictionary()
+        # repo_path -> background task indexing a workspace folder
+        self._warmups: dict[str, asyncio.Task] = {}
+        
+        # Dispatch tables, built once: method/tool name -> bound handler
+        self._methods = {
+            "initialize": self.handle_initialize,
+            "tools/list": self.handle_tools_list,
+            "tools/call": self.handle_tools_call,
+            "shutdown": self.handle_shutdown,
+        }
+        self._tools = {
+            "codetree_index": self.tool_index,
+            "codetree_query": self.tool_query,
+            "codetree_tree": self.tool_tree,
+            "codetree_find": self.tool_find,
+            "codetree_stats": self.tool_stats,
+        }
         
     async def handle_request(self, request: dict) -> dict:
         """Handle incoming MCP request."""
         method = request.get("method", "")
-        params = request.get("params", {})
         request_id = request.get("id")
         
+        handler = self._methods.get(method)
+        if handler is None:
+            return self.error_response(request_id, -32601, f"Unknown method: {method}")
+        
         try:
-            if method == "initialize":
-                result = await self.handle_initialize(params)
-            elif method == "tools/list":
-                result = await self.handle_tools_list()
-            elif method == "tools/call":
-                result = await self.handle_tools_call(params)
-            elif method == "shutdown":
-                result = {}
-            else:
-                return self.error_response(request_id, -32601, f"Unknown method: {method}")
-            
+            result = await handler(request.get("params", {}))
             return self.success_response(request_id, result)
         except Exception as e:
             return self.error_response(request_id, -32603, str(e))
     
     async def handle_initialize(self, params: dict) -> dict:
         """Handle initialize request."""
+        # Index the client's workspace folders while the handshake completes
+        for folder in params.get("workspaceFolders") or []:
+            uri = urlparse(folder.get("uri", ""))
+            if uri.scheme in ("", "file") and uri.path:
+                self.warm_up(unquote(uri.path))
+        
         return {
             "protocolVersion": "2024-11-05",
             "capabilities": {
@@ -54,7 +94,11 @@ class MCPServer:
             }
         }
     
-    async def handle_tools_list(self) -> dict:
+    async def handle_shutdown(self, params: dict) -> dict:
+        """Handle shutdown request."""
+        return {}
+    
+    async def handle_tools_list(self, params: dict) -> dict:
         """Return list of available tools."""
         return {
             "tools": [
@@ -147,44 +191,103 @@ class MCPServer:
     async def handle_tools_call(self, params: dict) -> dict:
         """Handle tool invocation."""
         tool_name = params.get("name", "")
-        arguments = params.get("arguments", {})
         
-        # Lazy import to avoid startup overhead
+        handler = self._tools.get(tool_name)
+        if handler is None:
+            raise ValueError(f"Unknown tool: {tool_name}")
+        
+        arguments = params.get("arguments", {})
+        if arguments.get("repo_path"):
+            await self.finish_warm_up(arguments["repo_path"])
+        return await handler(**arguments)
+    
+    def warm_up(self, repo_path: str) -> None:
+        """Start indexing a repository in a background thread."""
+        repo_path = str(Path(repo_path).resolve())
+        if repo_path in self._warmups or repo_path in self.codetree_instances:
+            return
+        task = asyncio.create_task(self._build_in_background(repo_path))
+        task.add_done_callback(partial(self._warm_up_done, repo_path))
+        self._warmups[repo_path] = task
+    
+    def _warm_up_done(self, repo_path: str, task: asyncio.Task) -> None:
+        """Keep a finished warm-up's instance, subject to the LRU bound, or log its failure."""
+        if self._warmups.get(repo_path) is task:
+            del self._warmups[repo_path]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            sys.stderr.write(f"Warm-up indexing of {repo_path} failed: {task.exception()}\n")
+        elif repo_path not in self.codetree_instances:
+            self._add_codetree(repo_path, task.result())
+    
+    async def _build_in_background(self, repo_path: str):
+        """Create a CodeTree instance and build its index off the event loop."""
         from codetree import CodeTree
         
-        repo_path = arguments.get("repo_path", "")
+        tree = CodeTree(repo_path)
+        await tree.build_index_async(incremental=True)
+        return tree
+    
+    async def finish_warm_up(self, repo_path: str) -> None:
+        """
+        Wait for a repository's background indexing, if any.
         
-        if tool_name == "codetree_index":
-            return await self.tool_index(repo_path)
-        elif tool_name == "codetree_query":
-            question = arguments.get("question", "")
-            return await self.tool_query(repo_path, question)
-        elif tool_name == "codetree_tree":
-            max_depth = arguments.get("max_depth", 3)
-            return await self.tool_tree(repo_path, max_depth)
-        elif tool_name == "codetree_find":
-            symbol = arguments.get("symbol", "")
-            return await self.tool_find(repo_path, symbol)
-        elif tool_name == "codetree_stats":
-            return await self.tool_stats(repo_path)
-        else:
-            raise ValueError(f"Unknown tool: {tool_name}")
+        Every tool call for the repo waits on the same task until it is
+        done; its done-callback, which runs first, keeps the result. A
+        failed warm-up is ignored here: the tool call builds (and reports)
+        on its own.
+        """
+        task = self._warmups.get(str(Path(repo_path).resolve()))
+        if task is not None:
+            await asyncio.wait((task,))
     
-    def get_codetree(self, repo_path: str):
-        """Get or create CodeTree instance for a repo."""
+    async def get_codetree(self, repo_path: str, refresh: bool = True):
+        """
+        Get or create CodeTree instance for a repo.
+        
+        A new instance refreshes the index saved by an earlier session unless
+        ``refresh`` is False, for callers that rebuild it themselves.
+        """
         from codetree import CodeTree
         
         repo_path = str(Path(repo_path).resolve())
         
-        if repo_path not in self.codetree_instances:
-            self.codetree_instances[repo_path] = CodeTree(repo_path)
+        tree = self.codetree_instances.get(repo_path)
+        if tree is not None:
+            self.codetree_instances.move_to_end(repo_path)
+            return tree
+        
+        tree = self._evicted_instances.pop(repo_path, None)
+        if tree is None:
+            tree = CodeTree(repo_path)
+            try:
+                saved = tree.index
+            except Exception:
+                # Unreadable saved index (truncated, or an older format) -
+                # build from scratch, which replaces it
+                await tree.build_index_async()
+            else:
+                # Reuse the saved index, but refresh it first: only files
+                # changed since then are re-parsed
+                if saved is not None and refresh:
+                    await tree.build_index_async(incremental=True)
         
-        return self.codetree_instances[repo_path]
+        self._add_codetree(repo_path, tree)
+        return tree
+    
+    def _add_codetree(self, repo_path: str, tree) -> None:
+        """Add an instance as most recently used, evicting the oldest over the limit."""
+        # Keep memory bounded to the most recently used repos
+        self.codetree_instances[repo_path] = tree
+        while len(self.codetree_instances) > max(tree.config.max_open_repos, 1):
+            old_path, old_tree = self.codetree_instances.popitem(last=False)
+            self._evicted_instances[old_path] = old_tree
     
-    async def tool_index(self, repo_path: str) -> dict:
+    async def tool_index(self, repo_path: str = "", **_) -> dict:
         """Index a repository."""
-        tree = self.get_codetree(repo_path)
-        index = tree.build_index()
+        tree = await self.get_codetree(repo_path, refresh=False)
+        index = await tree.build_index_async(incremental=True)
         
         return {
             "content": [
@@ -198,15 +301,15 @@ class MCPServer:
             ]
         }
     
-    async def tool_query(self, repo_path: str, question: str) -> dict:
+    async def tool_query(self, repo_path: str = "", question: str = "", **_) -> dict:
         """Query a repository."""
-        tree = self.get_codetree(repo_path)
+        tree = await self.get_codetree(repo_path)
         
         # Auto-index if needed
         if tree.index is None:
-            tree.build_index()
+            await tree.build_index_async()
         
-        answer = tree.query(question)
+        answer = await tree.query_async(question)
         
         return {
             "content": [
@@ -217,12 +320,12 @@ class MCPServer:
             ]
         }
     
-    async def tool_tree(self, repo_path: str, max_depth: int = 3) -> dict:
+    async def tool_tree(self, repo_path: str = "", max_depth: int = 3, **_) -> dict:
         """Show repository tree."""
-        tree = self.get_codetree(repo_path)
+        tree = await self.get_codetree(repo_path)
         
         if tree.index is None:
-            tree.build_index()
+            await tree.build_index_async()
         
         tree_str = tree.tree(max_depth=max_depth)
         
@@ -235,26 +338,28 @@ class MCPServer:
             ]
         }
     
-    async def tool_find(self, repo_path: str, symbol: str) -> dict:
+    async def tool_find(self, repo_path: str = "", symbol: str = "", **_) -> dict:
         """Find symbol references."""
-        tree = self.get_codetree(repo_path)
+        tree = await self.get_codetree(repo_path)
         
         if tree.index is None:
-            tree.build_index()
+            await tree.build_index_async()
         
         refs = tree.find(symbol)
         
         if not refs:
             text = f"No references found for '{symbol}'"
         else:
-            lines = [f"📍 Found {len(refs)} references to '{symbol}':\n"]
+            # Write lines straight into one buffer rather than a list of lines + join
+            buf = io.StringIO()
+            buf.write(f"📍 Found {len(refs)} references to '{symbol}':\n")
             for ref in refs:
                 if ref["type"] == "import":
-                    lines.append(f"  [import]   {ref['file']}: {ref['statement']}")
+                    buf.write(f"\n  [import]   {ref['file']}: {ref['statement']}")
                 else:
                     line_info = f":{ref['line']}" if ref.get('line') else ""
-                    lines.append(f"  [{ref['type']:8}] {ref['file']}{line_info} → {ref['name']}")
-            text = "\n".join(lines)
+                    buf.write(f"\n  [{ref['type']:8}] {ref['file']}{line_info} → {ref['name']}")
+            text = buf.getvalue()
         
         return {
             "content": [
@@ -265,12 +370,12 @@ class MCPServer:
             ]
         }
     
-    async def tool_stats(self, repo_path: str) -> dict:
+    async def tool_stats(self, repo_path: str = "", **_) -> dict:
         """Get repository stats."""
-        tree = self.get_codetree(repo_path)
+        tree = await self.get_codetree(repo_path)
         
         if tree.index is None:
-            tree.build_index()
+            await tree.build_index_async()
         
         stats = tree.stats()
         
@@ -312,12 +417,30 @@ class MCPServer:
         }
 
 
+async def read_message(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Read one Content-Length framed message body, or None at end of input."""
+    while True:
+        try:
+            header = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        
+        match = _CONTENT_LENGTH_RE.search(header)
+        if match:
+            return await reader.readexactly(int(match.group(1)))
+
+
+def frame_message(body: bytes) -> bytes:
+    """Prefix a message body with its Content-Length header."""
+    return b"Content-Length: %d\r\n\r\n%b" % (len(body), body)
+
+
 async def main():
     """Main entry point - runs MCP server over stdio."""
     server = MCPServer()
     
     # Read from stdin, write to stdout
-    reader = asyncio.StreamReader()
+    reader = asyncio.StreamReader(limit=READ_BUFFER_LIMIT)
     protocol = asyncio.StreamReaderProtocol(reader)
     await asyncio.get_event_loop().connect_read_pipe(lambda: protocol, sys.stdin)
     
@@ -328,33 +451,18 @@ async def main():
     
     while True:
         try:
-            # Read Content-Length header
-            header = await reader.readline()
-            if not header:
+            # Read the header block and body in two buffered reads
+            content = await read_message(reader)
+            if content is None:
                 break
+            request = json_loads(content)
             
-            # Skip empty lines
-            if header.strip() == b"":
-                continue
-                
-            if header.startswith(b"Content-Length:"):
-                content_length = int(header.decode().split(":")[1].strip())
-                
-                # Read empty line after header
-                await reader.readline()
-                
-                # Read content
-                content = await reader.read(content_length)
-                request = json.loads(content.decode())
-                
-                # Handle request
-                response = await server.handle_request(request)
-                
-                # Send response
-                response_bytes = json.dumps(response).encode()
-                writer.write(f"Content-Length: {len(response_bytes)}\r\n\r\n".encode())
-                writer.write(response_bytes)
-                await writer.drain()
+            # Handle request
+            response = await server.handle_request(request)
+            
+            # Send response as a single frame: one write, one drain
+            writer.write(frame_message(json_dumps(response)))
+            await writer.drain()
                 
         except Exception as e:
             sys.stderr.write(f"Error: {e}\n")
@@ -4,10 +4,36 @@ CodeTree - Vectorless RAG for Code Repositories
 Navigate your codebase like a human expert using LLM reasoning.
 """
 
-from .core import CodeTree
-from .indexer import CodeIndexer
-from .retriever import CodeRetriever
-from .config import Config
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core import CodeTree
+    from .indexer import CodeIndexer
+    from .retriever import CodeRetriever
+    from .config import Config
 
 __version__ = "0.1.0"
 __all__ = ["CodeTree", "CodeIndexer", "CodeRetriever", "Config"]
+
+# Public names are imported on first access, so importing a submodule
+# (e.g. the CLI) doesn't load the whole package.
+_LAZY_IMPORTS = {
+    "CodeTree": ".core",
+    "CodeIndexer": ".indexer",
+    "CodeRetriever": ".retriever",
+    "Config": ".config",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,300 @@
+"""Packed binary index format."""
+
+import struct
+import sys
+from array import array
+from dataclasses import fields
+from typing import Optional
+
+from .indexer import CodeIndex, SymbolRef, TreeNode
+
+MAGIC = b"CTBI"
+FORMAT_VERSION = 2
+
+# magic, format version, then the number of strings, nodes, string refs and symbols
+HEADER = struct.Struct("<4sIIIII")
+
+# Per node: type, name, path, summary, language, content hash, line count,
+# file count, mtime_ns, size, then the number of children, imports, functions,
+# classes and variables. Strings are ids into the string table.
+NODE = struct.Struct("<BIIIIIIIqqIIIII")
+
+# Per function/class: name, signature, docstring, line (-1 if unknown)
+SYMBOL = struct.Struct("<IIIi")
+
+# Index fields: repo path, created at, version, total files, total lines,
+# languages, parser version
+INDEX = struct.Struct("<IIIIIII")
+# Version 1 had no parser version; its indexes load with parser_version None
+_INDEX_V1 = struct.Struct("<IIIIII")
+
+NONE = 0xFFFFFFFF  # string id of None
+
+# Loading reads the optional string ids as signed, so NONE comes back as -1
+# and indexes a None appended to the end of the string table
+_NODE_READ = struct.Struct("<BIIiiiIIqqIIIII")
+_SYMBOL_READ = struct.Struct("<Iiii")
+FILE, DIRECTORY = 0, 1
+
+
+class _StringTable:
+    """Deduplicating table of the strings of an index."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def id(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+
+def dump_index(index: CodeIndex) -> bytes:
+    """Serialize an index to the packed binary format."""
+    table = _StringTable()
+    sid = table.id
+    nodes = bytearray()
+    refs = array("I")
+    symbols = bytearray()
+
+    stack = [index.root]
+    while stack:
+        node = stack.pop()
+        nodes += NODE.pack(
+            FILE if node.type == "file" else DIRECTORY,
+            sid(node.name), sid(node.path), sid(node.summary), sid(node.language),
+            sid(node.content_hash), node.line_count, node.file_count,
+            node.mtime_ns, node.size,
+            len(node.children), len(node.imports), len(node.functions),
+            len(node.classes), len(node.variables),
+        )
+        refs.extend(sid(imp) for imp in node.imports)
+        refs.extend(sid(var) for var in node.variables)
+        for ref in (*node.functions, *node.classes):
+            symbols += SYMBOL.pack(
+                sid(ref.name), sid(ref.signature), sid(ref.docstring),
+                -1 if ref.line is None else ref.line,
+            )
+        stack.extend(reversed(node.children))
+
+    languages = array("I")
+    for language, count in index.languages.items():
+        languages.extend((sid(language), count))
+    fields = INDEX.pack(
+        sid(index.repo_path), sid(index.created_at), sid(index.version),
+        index.total_files, index.total_lines, len(index.languages),
+        sid(index.parser_version),
+    )
+
+    lengths = array("I", [len(s) for s in table.strings])
+    if sys.byteorder == "big":
+        for values in (languages, lengths, refs):
+            values.byteswap()
+    text = "".join(table.strings).encode("utf-8", "surrogatepass")
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(table.strings),
+        len(nodes) // NODE.size, len(refs), len(symbols) // SYMBOL.size,
+    )
+    return b"".join((
+        header, fields, languages.tobytes(), lengths.tobytes(), text,
+        bytes(nodes), refs.tobytes(), bytes(symbols),
+    ))
+
+
+def load_index(data) -> CodeIndex:
+    """
+    Deserialize an index from the packed binary format.
+
+    ``data`` may be any buffer, such as an mmap. Each section is copied out
+    up front, so no views of it remain once this returns or raises. Only the
+    root node is built here; directories build their children on first
+    access, so shallow uses of a large index skip most of the decoding.
+    """
+    with memoryview(data) as view:
+        magic, version, n_strings, n_nodes, n_refs, n_symbols = HEADER.unpack_from(view)
+        if magic != MAGIC or version not in (1, FORMAT_VERSION):
+            raise ValueError("Not a packed binary index, or an unsupported version")
+        offset = HEADER.size
+
+        if version == FORMAT_VERSION:
+            (repo_path, created_at, index_version, total_files, total_lines, n_languages,
+             parser_version) = INDEX.unpack_from(view, offset)
+            offset += INDEX.size
+        else:
+            repo_path, created_at, index_version, total_files, total_lines, n_languages = (
+                _INDEX_V1.unpack_from(view, offset)
+            )
+            parser_version = NONE
+            offset += _INDEX_V1.size
+        languages = _uint_array(view[offset:offset + 8 * n_languages])
+        offset += 8 * n_languages
+        lengths = _uint_array(view[offset:offset + 4 * n_strings])
+        offset += 4 * n_strings
+
+        # Strings are stored as one UTF-8 blob; decode it once and slice by lengths
+        text_size = (
+            len(view) - offset - NODE.size * n_nodes - 4 * n_refs - SYMBOL.size * n_symbols
+        )
+        text = str(view[offset:offset + text_size], "utf-8", "surrogatepass")
+        offset += text_size
+        node_data = bytes(view[offset:offset + NODE.size * n_nodes])
+        offset += NODE.size * n_nodes
+        refs = _uint_array(view[offset:offset + 4 * n_refs])
+        offset += 4 * n_refs
+        symbol_data = bytes(view[offset:offset + SYMBOL.size * n_symbols])
+
+    strings = []
+    start = 0
+    for length in lengths:
+        strings.append(text[start:start + length])
+        start += length
+    strings.append(None)
+
+    reader = _NodeReader(strings, list(_NODE_READ.iter_unpack(node_data)), refs,
+                         list(_SYMBOL_READ.iter_unpack(symbol_data)))
+    string = strings.__getitem__
+    return CodeIndex(
+        root=reader.node(0),
+        repo_path=string(repo_path),
+        created_at=string(created_at),
+        version=string(index_version),
+        total_files=total_files,
+        total_lines=total_lines,
+        languages={
+            string(languages[i]): languages[i + 1] for i in range(0, len(languages), 2)
+        },
+        parser_version=None if parser_version == NONE else string(parser_version),
+    )
+
+
+class _NodeReader:
+    """
+    Decoded records of a packed index, turned into tree nodes on demand.
+
+    Nodes are stored in preorder, so a node's subtree is the contiguous run
+    of records up to ``ends[i]``; its children start right after it and each
+    following sibling starts where the previous one's subtree ends.
+    """
+
+    def __init__(self, strings: list[str], records: list[tuple], refs: array,
+                 symbols: list[tuple]):
+        self.strings = strings
+        self.records = records
+        self.refs = refs
+        self.symbols = symbols
+        self.ref_starts = array("I")
+        self.symbol_starts = array("I")
+        self.ends = array("I", bytes(4 * len(records)))
+
+        ref_pos = symbol_pos = 0
+        open_nodes: list[list[int]] = []  # [record index, children not yet ended]
+        for i, record in enumerate(records):
+            self.ref_starts.append(ref_pos)
+            self.symbol_starts.append(symbol_pos)
+            ref_pos += record[11] + record[14]
+            symbol_pos += record[12] + record[13]
+            if record[10]:
+                open_nodes.append([i, record[10]])
+                continue
+            # A leaf ends here, and so does every ancestor it was the last child of
+            self.ends[i] = i + 1
+            while open_nodes:
+                parent = open_nodes[-1]
+                parent[1] -= 1
+                if parent[1]:
+                    break
+                self.ends[parent[0]] = i + 1
+                open_nodes.pop()
+
+    def node(self, i: int) -> TreeNode:
+        """Build the node of record ``i``; a directory's children stay undecoded."""
+        (kind, name, path, summary, language, content_hash, line_count, file_count,
+         mtime_ns, size, n_children, n_imports, n_functions, n_classes,
+         n_variables) = self.records[i]
+        strings = self.strings
+        refs = self.refs
+        symbols = self.symbols
+        ref_start = self.ref_starts[i]
+        variables_start = ref_start + n_imports
+        functions_start = self.symbol_starts[i]
+        classes_start = functions_start + n_functions
+
+        node = (_LazyDirectory if n_children else TreeNode)(
+            name=strings[name],
+            type="file" if kind == FILE else "directory",
+            path=strings[path],
+            summary=strings[summary],
+            language=strings[language],
+            content_hash=strings[content_hash],
+            imports=[strings[j] for j in refs[ref_start:variables_start]],
+            functions=[
+                SymbolRef(strings[a], strings[b], strings[c], None if line < 0 else line)
+                for a, b, c, line in symbols[functions_start:classes_start]
+            ],
+            classes=[
+                SymbolRef(strings[a], strings[b], strings[c], None if line < 0 else line)
+                for a, b, c, line in symbols[classes_start:classes_start + n_classes]
+            ],
+            variables=[strings[j] for j in refs[variables_start:variables_start + n_variables]],
+            line_count=line_count,
+            mtime_ns=mtime_ns,
+            size=size,
+            file_count=file_count,
+        )
+        if n_children:
+            node._reader = self
+            node._record = i
+        return node
+
+    def children(self, i: int) -> list[TreeNode]:
+        """Build the children of record ``i``."""
+        children = []
+        child = i + 1
+        for _ in range(self.records[i][10]):
+            children.append(self.node(child))
+            child = self.ends[child]
+        return children
+
+
+_children_slot = TreeNode.children
+_COMPARED_FIELDS = tuple(f.name for f in fields(TreeNode) if f.compare)
+
+
+class _LazyDirectory(TreeNode):
+    """A loaded directory node whose children are decoded on first access."""
+
+    __slots__ = ("_reader", "_record")
+
+    @property
+    def children(self) -> list[TreeNode]:
+        reader = self._reader
+        if reader is not None:
+            self._reader = None
+            _children_slot.__set__(self, reader.children(self._record))
+        return _children_slot.__get__(self)
+
+    @children.setter
+    def children(self, value: list[TreeNode]) -> None:
+        self._reader = None
+        _children_slot.__set__(self, value)
+
+    def __eq__(self, other):
+        # The dataclass __eq__ requires the exact same class, so a loaded tree
+        # would never equal a built one; compare the fields of any TreeNode
+        if not isinstance(other, TreeNode):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in _COMPARED_FIELDS)
+
+
+def _uint_array(data: memoryview) -> array:
+    """Read packed little-endian uint32 values."""
+    values = array("I")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
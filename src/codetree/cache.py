@@ -0,0 +1,98 @@
+"""Persistent content-addressed cache for parsed files."""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Optional
+
+from .parser import FileInfo, PARSER_VERSION
+
+# Packages whose version changes can alter parse output
+GRAMMAR_PACKAGES = ("tree-sitter", "tree-sitter-python", "tree-sitter-javascript")
+
+
+def _grammar_versions() -> dict[str, str]:
+    """Get installed versions of the parser grammar packages."""
+    versions = {}
+    for name in GRAMMAR_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            pass
+    return versions
+
+
+def _version_tag() -> str:
+    """Name of the cache subdirectory for the running parser and grammar versions."""
+    tag = f"v{PARSER_VERSION}"
+    grammars = _grammar_versions()
+    if grammars:
+        digest = hashlib.sha256(json.dumps(grammars, sort_keys=True).encode("utf-8"))
+        tag += f"-{digest.hexdigest()[:12]}"
+    return tag
+
+
+class ParseCache:
+    """
+    On-disk cache of parse results keyed by SHA-256 of the file content.
+
+    Entries are stored as ``{hash}-{language}.pkl`` in a subdirectory of
+    ``cache_dir`` named after the parser and grammar versions, so installs
+    with different versions sharing a cache dir keep separate entries
+    instead of invalidating each other's.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.root = Path(cache_dir)
+        self.cache_dir = self.root / _version_tag()
+        self._ready = False
+
+    def _ensure_ready(self) -> None:
+        """Create the cache directory."""
+        if self._ready:
+            return
+        self._ready = True
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
+
+    def _entry_path(self, digest: str, language: str) -> Path:
+        return self.cache_dir / f"{digest}-{language}.pkl"
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        # Unique per process and thread: concurrent builds may write one entry
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def get(self, digest: str, language: str) -> Optional[FileInfo]:
+        """Look up a cached parse result, or None on a miss."""
+        self._ensure_ready()
+        try:
+            with open(self._entry_path(digest, language), "rb") as f:
+                info = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt or incompatible entry - treat as a miss
+            return None
+        return info if isinstance(info, FileInfo) else None
+
+    def put(self, digest: str, language: str, info: FileInfo) -> None:
+        """Store a parse result. Failures to write are ignored."""
+        self._ensure_ready()
+        try:
+            data = pickle.dumps(info, protocol=pickle.HIGHEST_PROTOCOL)
+            self._write_atomic(self._entry_path(digest, language), data)
+        except (OSError, pickle.PicklingError):
+            pass
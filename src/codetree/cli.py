@@ -4,15 +4,19 @@ import sys
 from pathlib import Path
 
 import click
-from rich.console import Console
-from rich.panel import Panel
-from rich.syntax import Syntax
-from rich.tree import Tree as RichTree
 
-from .core import CodeTree
-from .config import Config
+# rich and the indexing modules are imported inside the commands that use
+# them, so `codetree --help` and argument errors don't pay for the imports.
+_console = None
 
-console = Console()
+
+def get_console():
+    """Get the shared rich Console, creating it on first use."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
 
 
 @click.group()
@@ -24,9 +28,13 @@ def main():
 
 @main.command()
 @click.argument("repo_path", type=click.Path(exists=True), default=".")
-@click.option("--output", "-o", type=click.Path(), help="Output path for index JSON")
+@click.option("--output", "-o", type=click.Path(), help="Output path for the index (JSON if it ends in .json, compressed JSON for .json.zst)")
 def index(repo_path: str, output: str | None):
     """Build an index for a code repository."""
+    from rich.panel import Panel
+    from .core import CodeTree
+    
+    console = get_console()
     repo_path = Path(repo_path).resolve()
     
     console.print(f"\n🌲 [bold]CodeTree[/bold] - Indexing repository...")
@@ -50,7 +58,7 @@ def index(repo_path: str, output: str | None):
         tree.indexer.save_index(index, output_path)
         console.print(f"\n📁 Index saved to: [cyan]{output_path}[/cyan]")
     else:
-        console.print(f"\n📁 Index saved to: [cyan]{repo_path / '.codetree' / 'index.json'}[/cyan]")
+        console.print(f"\n📁 Index saved to: [cyan]{tree._index_path}[/cyan]")
 
 
 @main.command()
@@ -58,6 +66,10 @@ def index(repo_path: str, output: str | None):
 @click.option("--repo", "-r", type=click.Path(exists=True), default=".", help="Repository path")
 def query(question: str, repo: str):
     """Query the codebase with a natural language question."""
+    from rich.panel import Panel
+    from .core import CodeTree
+    
+    console = get_console()
     repo_path = Path(repo).resolve()
     
     tree = CodeTree(repo_path)
@@ -79,6 +91,10 @@ def query(question: str, repo: str):
 @click.option("--repo", "-r", type=click.Path(exists=True), default=".", help="Repository path")
 def chat(repo: str):
     """Interactive chat mode for querying the codebase."""
+    from rich.panel import Panel
+    from .core import CodeTree
+    
+    console = get_console()
     repo_path = Path(repo).resolve()
     
     tree = CodeTree(repo_path)
@@ -148,6 +164,9 @@ def chat(repo: str):
 @click.option("--depth", "-d", type=int, default=3, help="Maximum tree depth")
 def tree(repo: str, depth: int):
     """Show the code tree structure."""
+    from .core import CodeTree
+    
+    console = get_console()
     repo_path = Path(repo).resolve()
     
     ct = CodeTree(repo_path)
@@ -166,6 +185,9 @@ def tree(repo: str, depth: int):
 @click.option("--repo", "-r", type=click.Path(exists=True), default=".", help="Repository path")
 def find(symbol: str, repo: str):
     """Find references to a symbol in the codebase."""
+    from .core import CodeTree
+    
+    console = get_console()
     repo_path = Path(repo).resolve()
     
     ct = CodeTree(repo_path)
@@ -193,6 +215,10 @@ def find(symbol: str, repo: str):
 @click.option("--repo", "-r", type=click.Path(exists=True), default=".", help="Repository path")
 def stats(repo: str):
     """Show statistics about the indexed repository."""
+    from rich.panel import Panel
+    from .core import CodeTree
+    
+    console = get_console()
     repo_path = Path(repo).resolve()
     
     ct = CodeTree(repo_path)
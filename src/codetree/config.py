@@ -1,11 +1,36 @@
 """Configuration management for CodeTree."""
 
 import os
+import re
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 import yaml
 
+# Prefer the libyaml-backed C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLLoader
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# ${VAR} references in config values
+_ENV_VAR_RE = re.compile(r"\$\{(\w+)\}")
+
+
+def _expand_env(value: Optional[str]) -> Optional[str]:
+    """Replace ${VAR} references with environment values (unset -> empty)."""
+    if not value or "${" not in value:
+        return value
+    return _ENV_VAR_RE.sub(lambda m: os.environ.get(m.group(1), ""), value) or None
+
 
 @dataclass
 class LLMConfig:
@@ -19,9 +44,8 @@ class LLMConfig:
 
     def __post_init__(self):
         # Resolve environment variables
-        if self.api_key and self.api_key.startswith("${") and self.api_key.endswith("}"):
-            env_var = self.api_key[2:-1]
-            self.api_key = os.environ.get(env_var)
+        self.api_key = _expand_env(self.api_key)
+        self.base_url = _expand_env(self.base_url)
         
         # Try default env vars if no key set
         if not self.api_key:
@@ -42,6 +66,9 @@ class IndexConfig:
     include_patterns: list[str] = field(default_factory=list)
     max_file_size: int = 100_000  # bytes
     max_files: int = 10_000
+    parse_cache: bool = True
+    parse_cache_path: Optional[str] = None  # defaults to <cache_dir>/parse-cache
+    parse_workers: int = 0  # processes used for parsing; 0 = one per CPU
 
 
 @dataclass 
@@ -50,35 +77,59 @@ class Config:
     llm: LLMConfig = field(default_factory=LLMConfig)
     index: IndexConfig = field(default_factory=IndexConfig)
     cache_dir: Path = field(default_factory=lambda: Path.home() / ".cache" / "codetree")
+    max_open_repos: int = 8  # repositories kept in memory by long-running servers
 
     @classmethod
     def load(cls, config_path: Optional[Path] = None) -> "Config":
         """Load configuration from file or defaults."""
-        config = cls()
-        
         # Search for config file
         search_paths = []
         if config_path:
             search_paths.append(config_path)
+        cwd = Path.cwd()
         search_paths.extend([
-            Path.cwd() / ".codetree.yaml",
-            Path.cwd() / ".codetree.yml",
+            cwd / ".codetree.yaml",
+            cwd / ".codetree.yml",
+            cwd / ".codetree.toml",
             Path.home() / ".config" / "codetree" / "config.yaml",
         ])
         
+        # Just try to open each candidate: one syscall per miss, none wasted
+        # on a separate exists() check for the hit
         for path in search_paths:
-            if path.exists():
-                config = cls.from_yaml(path)
-                break
+            try:
+                return cls.from_file(path)
+            except FileNotFoundError:
+                continue
         
-        return config
+        return cls()
+
+    @classmethod
+    def from_file(cls, path: Path) -> "Config":
+        """Load configuration from a YAML or TOML file, by suffix."""
+        if Path(path).suffix == ".toml":
+            return cls.from_toml(path)
+        return cls.from_yaml(path)
 
     @classmethod
     def from_yaml(cls, path: Path) -> "Config":
         """Load configuration from YAML file."""
         with open(path) as f:
-            data = yaml.safe_load(f) or {}
-        
+            data = yaml.load(f, Loader=YAMLLoader) or {}
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_toml(cls, path: Path) -> "Config":
+        """Load configuration from TOML file."""
+        if tomllib is None:
+            raise ImportError("tomli package not installed. Run: pip install tomli")
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Config":
+        """Create configuration from a parsed config mapping."""
         llm_data = data.get("llm", {})
         index_data = data.get("index", {})
         
@@ -86,6 +137,7 @@ class Config:
             llm=LLMConfig(**llm_data),
             index=IndexConfig(**index_data),
             cache_dir=Path(data.get("cache_dir", Path.home() / ".cache" / "codetree")),
+            max_open_repos=data.get("max_open_repos", 8),
         )
 
     def to_yaml(self, path: Path) -> None:
@@ -103,6 +155,7 @@ class Config:
                 "max_file_size": self.index.max_file_size,
             },
             "cache_dir": str(self.cache_dir),
+            "max_open_repos": self.max_open_repos,
         }
         
         path.parent.mkdir(parents=True, exist_ok=True)
@@ -1,11 +1,13 @@
 """Core CodeTree class - main entry point."""
 
+import asyncio
 from pathlib import Path
 from typing import Optional
 
 from .config import Config
 from .indexer import CodeIndexer, CodeIndex
 from .retriever import CodeRetriever
+from .symbols import SymbolIndex
 
 
 class CodeTree:
@@ -34,7 +36,11 @@ class CodeTree:
         self.config = config or Config.load()
         self.indexer = CodeIndexer(self.config)
         self._index: Optional[CodeIndex] = None
+        # (root content hash, parser version) of the index saved on disk
+        self._saved_root: Optional[tuple[str, Optional[str]]] = None
         self._retriever: Optional[CodeRetriever] = None
+        self._find_cache: dict[str, list[dict]] = {}  # lowercased symbol -> references
+        self._find_cache_symbols: Optional[SymbolIndex] = None  # symbol table the cache is for
         
         # Check for existing index
         self._index_path = self._get_index_path()
@@ -42,13 +48,20 @@ class CodeTree:
     def _get_index_path(self) -> Path:
         """Get the path where index should be stored."""
         # Store in repo's .codetree directory
-        return self.repo_path / ".codetree" / "index.json"
+        return self.repo_path / ".codetree" / "index.bin"
     
     @property
     def index(self) -> Optional[CodeIndex]:
         """Get the current index, loading from disk if available."""
-        if self._index is None and self._index_path.exists():
-            self._index = self.indexer.load_index(self._index_path)
+        if self._index is None:
+            for path in (self._index_path, self._index_path.with_name("index.json")):
+                if path.exists():
+                    self._index = self.indexer.load_index(path)
+                    if path == self._index_path:
+                        self._saved_root = (
+                            self._index.root.content_hash, self._index.parser_version
+                        )
+                    break
         return self._index
     
     @property
@@ -60,24 +73,54 @@ class CodeTree:
             self._retriever = CodeRetriever(self.index, self.config)
         return self._retriever
     
-    def build_index(self, save: bool = True) -> CodeIndex:
+    def build_index(self, save: bool = True, incremental: bool = False) -> CodeIndex:
         """
         Build the code index for the repository.
         
         Args:
             save: Whether to save the index to disk
+            incremental: Only re-parse files whose content changed since
+                the last saved index
             
         Returns:
             The built CodeIndex
         """
-        self._index = self.indexer.build_index(self.repo_path)
-        self._retriever = None  # Reset retriever
+        previous = self.index if incremental else None
+        index = self.indexer.build_index(self.repo_path, previous)
+        # Parsed by another parser version, an unchanged tree still gets new nodes
+        state = (index.root.content_hash, index.parser_version)
         
-        if save:
-            self.indexer.save_index(self._index, self._index_path)
+        if previous is not None and state == (previous.root.content_hash, previous.parser_version):
+            # Nothing changed - keep the previous index and its caches
+            index = previous
+        else:
+            self._index = index
+            self._retriever = None  # Reset retriever
+            self._find_cache.clear()
+        
+        # Touched files get new stat info in place; saving it spares the next
+        # session from reading and hashing them again
+        stale = state != self._saved_root or self.indexer.restated_files
+        if save and (stale or not self._index_path.exists()):
+            self.indexer.save_index(index, self._index_path)
+            self._saved_root = state
         
         return self._index
     
+    async def build_index_async(self, save: bool = True, incremental: bool = False) -> CodeIndex:
+        """
+        Build the code index in a worker thread, without blocking the event loop.
+        
+        Args:
+            save: Whether to save the index to disk
+            incremental: Only re-parse files whose content changed since
+                the last saved index
+            
+        Returns:
+            The built CodeIndex
+        """
+        return await asyncio.to_thread(self.build_index, save, incremental)
+    
     def query(self, question: str) -> str:
         """
         Query the codebase with a natural language question.
@@ -90,6 +133,18 @@ class CodeTree:
         """
         return self.retriever.query(question)
     
+    async def query_async(self, question: str) -> str:
+        """
+        Query the codebase without blocking the event loop.
+        
+        Args:
+            question: The question to ask about the code
+            
+        Returns:
+            Answer based on relevant code sections
+        """
+        return await self.retriever.aquery(question)
+    
     def find(self, symbol: str) -> list[dict]:
         """
         Find all occurrences of a symbol in the codebase.
@@ -102,49 +157,45 @@ class CodeTree:
         """
         if self.index is None:
             raise RuntimeError("No index available. Run build_index() first.")
-        return self._find_references(symbol)
+        
+        # The index replaces its symbol table on rebuilds and tree_changed(),
+        # so a different table means the cached references may be stale
+        symbols = self.symbols
+        if symbols is not self._find_cache_symbols:
+            self._find_cache.clear()
+            self._find_cache_symbols = symbols
+        
+        # Matching is case-insensitive, so cache by the lowercased symbol
+        key = symbol.lower()
+        references = self._find_cache.get(key)
+        if references is None:
+            references = self._find_references(symbol)
+            self._find_cache[key] = references
+        # Copy the dicts too, so callers can't modify the cached references
+        return [dict(ref) for ref in references]
+    
+    def find_many(self, symbols: list[str]) -> dict[str, list[dict]]:
+        """
+        Find all occurrences of several symbols in one pass.
+        
+        Args:
+            symbols: Symbol names to search for
+            
+        Returns:
+            Dict mapping each symbol to its list of references
+        """
+        return self.symbols.find_many(symbols)
+    
+    @property
+    def symbols(self) -> SymbolIndex:
+        """Get the symbol table of the current index, building it if needed."""
+        if self.index is None:
+            raise RuntimeError("No index available. Run build_index() first.")
+        return self.index.symbols
     
     def _find_references(self, symbol: str) -> list[dict]:
         """Find all references to a symbol across the codebase (no LLM needed)."""
-        from .indexer import TreeNode
-        references = []
-        
-        def search_node(node: TreeNode):
-            if node.type == "file":
-                # Check functions
-                for func in node.functions:
-                    if symbol.lower() in func.get("name", "").lower():
-                        references.append({
-                            "type": "function",
-                            "file": node.path,
-                            "name": func["name"],
-                            "line": func.get("line"),
-                        })
-                
-                # Check classes
-                for cls in node.classes:
-                    if symbol.lower() in cls.get("name", "").lower():
-                        references.append({
-                            "type": "class",
-                            "file": node.path,
-                            "name": cls["name"],
-                            "line": cls.get("line"),
-                        })
-                
-                # Check imports
-                for imp in node.imports:
-                    if symbol.lower() in imp.lower():
-                        references.append({
-                            "type": "import",
-                            "file": node.path,
-                            "statement": imp,
-                        })
-            else:
-                for child in node.children:
-                    search_node(child)
-        
-        search_node(self.index.root)
-        return references
+        return self.symbols.find(symbol)
     
     def tree(self, max_depth: int = 3) -> str:
         """
@@ -1,17 +1,73 @@
 """Code indexer - builds tree structure from repository."""
 
+import fnmatch
 import hashlib
 import json
-from dataclasses import dataclass, field, asdict
-from pathlib import Path
-from typing import Optional, Any
+import mmap
+import os
+import re
+import stat
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path, PurePath
+from typing import TYPE_CHECKING, Optional
 from datetime import datetime
 
-from .config import Config, IndexConfig
-from .parser import CodeParser, FileInfo, LANGUAGE_EXTENSIONS
+from .cache import ParseCache
+from .config import Config
+from .parser import CodeParser, FileInfo, PARSER_VERSION, _EXT_TO_LANG
 
+if TYPE_CHECKING:
+    from .symbols import SymbolIndex
 
-@dataclass
+# orjson is an optional speedup for the JSON index format
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# zstandard is optional: it compresses saved indexes (index.bin and .json.zst)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Leading bytes of a zstd frame, used to recognize compressed index files
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Number of paths stat'ed per task when scanning the repository
+STAT_BATCH_SIZE = 512
+
+
+@dataclass(slots=True)
+class SymbolRef:
+    """A function or class defined in a file."""
+    name: str
+    signature: str = ""
+    docstring: Optional[str] = None
+    line: Optional[int] = None
+    
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "name": self.name,
+            "signature": self.signature,
+            "docstring": self.docstring,
+            "line": self.line,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "SymbolRef":
+        """Create SymbolRef from dictionary."""
+        get = data.get
+        # Positional arguments: this runs once per symbol when loading JSON
+        return cls(sys.intern(get("name", "")), get("signature", ""), get("docstring"), get("line"))
+
+
+@dataclass(slots=True)
 class TreeNode:
     """A node in the code tree."""
     name: str
@@ -20,12 +76,19 @@ class TreeNode:
     summary: Optional[str] = None
     language: Optional[str] = None
     
-    # For files
+    # SHA-256 of a file's content, or of a directory's child names and hashes
+    content_hash: Optional[str] = None
+    
+    # For files. Symbols stay per-file objects: files hold only a handful, so
+    # per-file columns would cost more than they save. Scans over all symbols
+    # use the repository-wide columns of symbols.SymbolIndex instead.
     imports: list[str] = field(default_factory=list)
-    functions: list[dict] = field(default_factory=list)
-    classes: list[dict] = field(default_factory=list)
+    functions: list[SymbolRef] = field(default_factory=list)
+    classes: list[SymbolRef] = field(default_factory=list)
     variables: list[str] = field(default_factory=list)
     line_count: int = 0
+    mtime_ns: int = 0  # stat info the content hash was computed for
+    size: int = 0
     
     # For directories
     children: list["TreeNode"] = field(default_factory=list)
@@ -41,6 +104,8 @@ class TreeNode:
         
         if self.summary:
             result["summary"] = self.summary
+        if self.content_hash:
+            result["content_hash"] = self.content_hash
             
         if self.type == "file":
             if self.language:
@@ -48,13 +113,16 @@ class TreeNode:
             if self.imports:
                 result["imports"] = self.imports
             if self.functions:
-                result["functions"] = self.functions
+                result["functions"] = [f.to_dict() for f in self.functions]
             if self.classes:
-                result["classes"] = self.classes
+                result["classes"] = [c.to_dict() for c in self.classes]
             if self.variables:
                 result["variables"] = self.variables
             if self.line_count:
                 result["line_count"] = self.line_count
+            if self.mtime_ns:
+                result["mtime_ns"] = self.mtime_ns
+                result["size"] = self.size
         else:  # directory
             if self.children:
                 result["children"] = [c.to_dict() for c in self.children]
@@ -64,7 +132,49 @@ class TreeNode:
         return result
 
 
-@dataclass
+def _parse_node(data: dict) -> TreeNode:
+    """Create a TreeNode from its to_dict() form."""
+    if data["type"] == "file":
+        return _parse_file_node(data)
+    return _parse_directory_node(data)
+
+
+def _parse_file_node(data: dict) -> TreeNode:
+    get = data.get
+    symbol = SymbolRef.from_dict
+    intern = sys.intern
+    language = get("language")
+    return TreeNode(
+        name=data["name"],
+        type="file",
+        path=data["path"],
+        summary=get("summary"),
+        language=intern(language) if language else language,
+        content_hash=get("content_hash"),
+        imports=[intern(i) for i in get("imports", ())],
+        functions=[symbol(f) for f in get("functions", ())],
+        classes=[symbol(c) for c in get("classes", ())],
+        variables=get("variables") or [],
+        line_count=get("line_count", 0),
+        mtime_ns=get("mtime_ns", 0),
+        size=get("size", 0),
+    )
+
+
+def _parse_directory_node(data: dict) -> TreeNode:
+    get = data.get
+    return TreeNode(
+        name=data["name"],
+        type=data["type"],
+        path=data["path"],
+        summary=get("summary"),
+        content_hash=get("content_hash"),
+        children=[_parse_node(c) for c in get("children", ())],
+        file_count=get("file_count", 0),
+    )
+
+
+@dataclass(slots=True)
 class CodeIndex:
     """The complete code index for a repository."""
     root: TreeNode
@@ -74,6 +184,14 @@ class CodeIndex:
     total_files: int = 0
     total_lines: int = 0
     languages: dict[str, int] = field(default_factory=dict)  # language -> file count
+    parser_version: Optional[str] = None  # PARSER_VERSION the files were parsed with
+    # Rendered compact trees keyed by (max_depth, tree version)
+    _tree_cache: dict[tuple[int, int], str] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _tree_version: int = field(default=0, init=False, repr=False, compare=False)
+    # Symbol table shared by CodeTree.find and the retriever, built on first use
+    _symbols: Optional["SymbolIndex"] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
@@ -84,6 +202,7 @@ class CodeIndex:
             "total_files": self.total_files,
             "total_lines": self.total_lines,
             "languages": self.languages,
+            "parser_version": self.parser_version,
             "root": self.root.to_dict(),
         }
     
@@ -91,76 +210,87 @@ class CodeIndex:
         """Convert to JSON string."""
         return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
     
+    def to_json_bytes(self) -> bytes:
+        """Convert to UTF-8 JSON indented by 2, using orjson if installed."""
+        if orjson is not None:
+            return orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2)
+        return self.to_json().encode("utf-8")
+    
     @classmethod
     def from_dict(cls, data: dict) -> "CodeIndex":
         """Create CodeIndex from dictionary."""
-        def parse_node(node_data: dict) -> TreeNode:
-            children = []
-            if "children" in node_data:
-                children = [parse_node(c) for c in node_data["children"]]
-            
-            return TreeNode(
-                name=node_data["name"],
-                type=node_data["type"],
-                path=node_data["path"],
-                summary=node_data.get("summary"),
-                language=node_data.get("language"),
-                imports=node_data.get("imports", []),
-                functions=node_data.get("functions", []),
-                classes=node_data.get("classes", []),
-                variables=node_data.get("variables", []),
-                line_count=node_data.get("line_count", 0),
-                children=children,
-                file_count=node_data.get("file_count", 0),
-            )
-        
         return cls(
-            root=parse_node(data["root"]),
+            root=_parse_node(data["root"]),
             repo_path=data["repo_path"],
             created_at=data["created_at"],
             version=data.get("version", "0.1.0"),
             total_files=data.get("total_files", 0),
             total_lines=data.get("total_lines", 0),
             languages=data.get("languages", {}),
+            parser_version=data.get("parser_version"),
         )
     
     @classmethod
-    def from_json(cls, json_str: str) -> "CodeIndex":
+    def from_json(cls, json_str: str | bytes) -> "CodeIndex":
         """Create CodeIndex from JSON string."""
-        return cls.from_dict(json.loads(json_str))
+        loads = orjson.loads if orjson is not None else json.loads
+        return cls.from_dict(loads(json_str))
+
+    def tree_changed(self) -> None:
+        """Invalidate cached renderings and symbols after the tree was modified in place."""
+        self._tree_version += 1
+        self._tree_cache.clear()
+        self._symbols = None
+    
+    @property
+    def symbols(self) -> "SymbolIndex":
+        """Get the symbol table of this index, building it on first use."""
+        if self._symbols is None:
+            from .symbols import SymbolIndex
+            self._symbols = SymbolIndex.from_index(self)
+        return self._symbols
 
     def get_compact_tree(self, max_depth: int = 3) -> str:
         """Get a compact text representation of the tree for LLM context."""
+        key = (max_depth, self._tree_version)
+        tree = self._tree_cache.get(key)
+        if tree is None:
+            tree = self._tree_cache[key] = self._render_compact_tree(max_depth)
+        return tree
+
+    def _render_compact_tree(self, max_depth: int) -> str:
+        """Render the compact tree down to max_depth."""
         lines = []
+        append = lines.append
         
-        def format_node(node: TreeNode, depth: int = 0, prefix: str = ""):
-            if depth > max_depth:
-                return
-            
+        # Preorder walk with an explicit stack; children of nodes at
+        # max_depth are never pushed, so cut-off subtrees are not visited
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
             indent = "  " * depth
             
             if node.type == "directory":
-                lines.append(f"{indent}{prefix}{node.name}/")
+                append(f"{indent}{node.name}/")
                 if node.summary:
-                    lines.append(f"{indent}  # {node.summary}")
-                for i, child in enumerate(node.children):
-                    format_node(child, depth + 1)
+                    append(f"{indent}  # {node.summary}")
+                if depth < max_depth:
+                    stack.extend((child, depth + 1) for child in reversed(node.children))
             else:
                 # File
                 lang_tag = f"[{node.language}]" if node.language else ""
-                lines.append(f"{indent}{prefix}{node.name} {lang_tag}")
+                append(f"{indent}{node.name} {lang_tag}")
                 
                 # Show functions and classes
                 if node.functions:
-                    func_names = [f["name"] for f in node.functions[:5]]
+                    func_names = [f.name for f in node.functions[:5]]
                     more = f" (+{len(node.functions) - 5} more)" if len(node.functions) > 5 else ""
-                    lines.append(f"{indent}  → functions: {', '.join(func_names)}{more}")
+                    append(f"{indent}  → functions: {', '.join(func_names)}{more}")
                 
                 if node.classes:
-                    class_names = [c["name"] for c in node.classes[:5]]
-                    lines.append(f"{indent}  → classes: {', '.join(class_names)}")
+                    class_names = [c.name for c in node.classes[:5]]
+                    append(f"{indent}  → classes: {', '.join(class_names)}")
         
-        format_node(self.root)
         return "\n".join(lines)
 
 
@@ -169,15 +299,43 @@ class CodeIndexer:
     
     def __init__(self, config: Optional[Config] = None):
         self.config = config or Config.load()
-        self.parser = CodeParser()
+        self.parser = CodeParser(self.config.index.max_file_size)
+        self.parse_cache = self._create_parse_cache()
+        self._previous_files: dict[str, TreeNode] = {}
+        # Previous nodes the last build kept but gave new stat info (touched files)
+        self.restated_files = 0
+        self._suffix_languages: dict[str, str] = {}  # extension -> enabled language
+        self._exclude_prefixes: tuple[str, ...] = ()
+        self._exclude_name_re: Optional[re.Pattern] = None  # single-component globs
+        self._exclude_globs: list[str] = []  # multi-component globs
         self._stats = {
             "total_files": 0,
             "total_lines": 0,
             "languages": {},
         }
     
-    def build_index(self, repo_path: Path) -> CodeIndex:
-        """Build a code index from the repository."""
+    def _create_parse_cache(self) -> Optional[ParseCache]:
+        """Create the persistent parse cache, if enabled."""
+        if not self.config.index.parse_cache:
+            return None
+        cache_path = self.config.index.parse_cache_path or self.config.cache_dir / "parse-cache"
+        return ParseCache(Path(cache_path))
+    
+    def build_index(
+        self,
+        repo_path: Path,
+        previous: Optional[CodeIndex] = None,
+    ) -> CodeIndex:
+        """
+        Build a code index from the repository.
+        
+        If a previous index is given, files whose content hashes are
+        unchanged reuse their previous nodes instead of being re-parsed
+        (their stat info is updated in place). Directory hashes are
+        recomputed bottom-up, so an unchanged repository gets the same
+        ``root.content_hash``. A previous index from another parser version
+        is ignored.
+        """
         repo_path = Path(repo_path).resolve()
         
         if not repo_path.exists():
@@ -188,8 +346,38 @@ class CodeIndexer:
             "total_lines": 0,
             "languages": {},
         }
+        self._prepare_filters()
+        self.restated_files = 0
+        self._previous_files = {}
+        # Nodes parsed by another parser version may be stale, so reparse them all
+        if previous is not None and previous.parser_version == PARSER_VERSION:
+            self._previous_files = {
+                node.path: node for node in _iter_file_nodes(previous.root)
+            }
+        
+        try:
+            candidates = self._list_candidates(repo_path)
+            file_nodes = []
+            pending: list[_PendingFile] = []
+            for relative_path, st in self._stat_files(repo_path, candidates):
+                node = self._index_file(repo_path, relative_path, st, pending)
+                if node:
+                    file_nodes.append(node)
+            
+            # Parse changed files (possibly in parallel), then build their nodes here
+            for item, file_info in zip(pending, self._parse_pending(pending)):
+                if not file_info:
+                    continue
+                if self.parse_cache:
+                    self.parse_cache.put(item.digest, item.language, file_info)
+                file_nodes.append(
+                    self._file_node(file_info, item.relative_path, item.digest, item.st)
+                )
+        finally:
+            self._previous_files = {}
         
-        root = self._index_directory(repo_path, repo_path)
+        root = self._build_tree(repo_path, file_nodes)
+        self._collect_stats(root)
         
         return CodeIndex(
             root=root,
@@ -198,125 +386,393 @@ class CodeIndexer:
             total_files=self._stats["total_files"],
             total_lines=self._stats["total_lines"],
             languages=self._stats["languages"],
+            parser_version=PARSER_VERSION,
         )
     
-    def _index_directory(self, dir_path: Path, repo_root: Path) -> TreeNode:
-        """Recursively index a directory."""
-        relative_path = dir_path.relative_to(repo_root)
+    def _prepare_filters(self) -> None:
+        """Precompute the extension and exclude filters from the config."""
+        enabled = set(self.config.index.languages)
+        self._suffix_languages = {
+            extension: language
+            for extension, language in _EXT_TO_LANG.items()
+            if language in enabled
+        }
         
-        children = []
-        file_count = 0
+        exclude = self.config.index.exclude
+        self._exclude_prefixes = tuple(exclude)
+        # A glob without separators matches the last path component only, so
+        # all of them can be checked against the name with one regex
+        single = [p for p in exclude if "/" not in p and "\\" not in p]
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        self._exclude_name_re = (
+            re.compile("|".join(fnmatch.translate(p) for p in single), flags)
+            if single else None
+        )
+        self._exclude_globs = [p for p in exclude if p not in single]
+    
+    def _source_language(self, relative_path: str) -> Optional[str]:
+        """Get the language of an indexed source file from its extension."""
+        return self._suffix_languages.get(os.path.splitext(relative_path)[1].lower())
+    
+    def _list_candidates(self, repo_root: Path) -> list[str]:
+        """
+        List candidate source files, using git's file list for git checkouts.
+        
+        Files are filtered by extension here, before anything is stat'ed or read.
+        """
+        tracked = self._git_ls_files(repo_root)
+        if tracked is None:
+            return self._walk(repo_root)
+        
+        root = str(repo_root)
+        excluded_dirs: dict[str, bool] = {"": False}
+        
+        def is_excluded_dir(relative_dir: str) -> bool:
+            excluded = excluded_dirs.get(relative_dir)
+            if excluded is None:
+                excluded = (
+                    is_excluded_dir(os.path.dirname(relative_dir))
+                    or self._should_exclude(os.path.join(root, relative_dir), repo_root)
+                )
+                excluded_dirs[relative_dir] = excluded
+            return excluded
+        
+        return [
+            relative_path for relative_path in tracked
+            if self._source_language(relative_path)
+            and not is_excluded_dir(os.path.dirname(relative_path))
+            and not self._should_exclude(os.path.join(root, relative_path), repo_root)
+        ]
+    
+    def _git_ls_files(self, repo_root: Path) -> Optional[list[str]]:
+        """
+        List tracked and untracked, non-ignored files with ``git ls-files``.
+        
+        Returns None if the repository is not a git checkout or git fails.
+        """
+        if not (repo_root / ".git").exists():
+            return None
         
         try:
-            entries = sorted(dir_path.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))
-        except PermissionError:
-            entries = []
+            result = subprocess.run(
+                ["git", "ls-files", "-co", "--exclude-standard", "-z"],
+                cwd=repo_root,
+                capture_output=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        
+        output = result.stdout.decode("utf-8", errors="surrogateescape")
+        return [os.path.normpath(path) for path in output.split("\0") if path]
+    
+    def _walk(self, repo_root: Path) -> list[str]:
+        """List candidate files (relative paths), skipping excluded entries."""
+        files = []
+        stack = [""]
         
-        for entry in entries:
-            # Skip excluded patterns
-            if self._should_exclude(entry, repo_root):
+        while stack:
+            relative_dir = stack.pop()
+            try:
+                with os.scandir(repo_root / relative_dir) as it:
+                    entries = list(it)
+            except OSError:
                 continue
             
-            if entry.is_dir():
-                child_node = self._index_directory(entry, repo_root)
-                if child_node.children or child_node.type == "file":
-                    children.append(child_node)
-                    file_count += child_node.file_count
-            elif entry.is_file():
-                child_node = self._index_file(entry, repo_root)
-                if child_node:
-                    children.append(child_node)
-                    file_count += 1
+            for entry in entries:
+                # d_type from scandir tells files from directories without a stat
+                is_dir = entry.is_dir()
+                if not is_dir and not self._source_language(entry.name):
+                    continue
+                
+                # Skip excluded patterns
+                if self._should_exclude(entry, repo_root):
+                    continue
+                
+                relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+                if is_dir:
+                    stack.append(relative_path)
+                elif entry.is_file():
+                    files.append(relative_path)
         
-        return TreeNode(
-            name=dir_path.name or str(repo_root.name),
-            type="directory",
-            path=str(relative_path) if str(relative_path) != "." else "",
-            children=children,
-            file_count=file_count,
-        )
+        return files
+    
+    def _stat_files(
+        self, repo_root: Path, relative_paths: list[str]
+    ) -> list[tuple[str, os.stat_result]]:
+        """
+        Stat files concurrently in batches so slow filesystems can overlap
+        the syscalls. Paths that vanished, aren't regular files or exceed
+        the maximum file size are dropped.
+        """
+        root = str(repo_root)
+        max_file_size = self.config.index.max_file_size
+        
+        def stat_batch(batch: list[str]) -> list[tuple[str, os.stat_result]]:
+            results = []
+            for relative_path in batch:
+                try:
+                    st = os.stat(os.path.join(root, relative_path))
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_size <= max_file_size:
+                    results.append((relative_path, st))
+            return results
+        
+        batches = [
+            relative_paths[i:i + STAT_BATCH_SIZE]
+            for i in range(0, len(relative_paths), STAT_BATCH_SIZE)
+        ]
+        if len(batches) <= 1:
+            return stat_batch(relative_paths)
+        
+        with ThreadPoolExecutor() as executor:
+            return [item for batch in executor.map(stat_batch, batches) for item in batch]
+    
+    def _build_tree(self, repo_root: Path, file_nodes: list[TreeNode]) -> TreeNode:
+        """Assemble file nodes into the directory hierarchy."""
+        root = TreeNode(name=repo_root.name, type="directory", path="")
+        directories = {"": root}
+        
+        def get_directory(path: str) -> TreeNode:
+            node = directories.get(path)
+            if node is None:
+                node = TreeNode(name=os.path.basename(path), type="directory", path=path)
+                get_directory(os.path.dirname(path)).children.append(node)
+                directories[path] = node
+            return node
+        
+        for file_node in file_nodes:
+            get_directory(os.path.dirname(file_node.path)).children.append(file_node)
+        
+        self._finalize_directory(root)
+        return root
     
-    def _index_file(self, file_path: Path, repo_root: Path) -> Optional[TreeNode]:
-        """Index a single file."""
-        relative_path = file_path.relative_to(repo_root)
+    def _finalize_directory(self, node: TreeNode) -> None:
+        """Sort children, count files and hash a directory, bottom-up."""
+        node.children.sort(key=lambda c: (c.type == "file", c.name.lower()))
+        
+        file_count = 0
+        for child in node.children:
+            if child.type == "directory":
+                self._finalize_directory(child)
+                file_count += child.file_count
+            else:
+                file_count += 1
+        
+        node.file_count = file_count
+        node.content_hash = self._directory_hash(node.children)
+    
+    def _collect_stats(self, root: TreeNode) -> None:
+        """Aggregate file stats in tree order."""
+        for node in _iter_file_nodes(root):
+            self._stats["total_files"] += 1
+            self._stats["total_lines"] += node.line_count
+            self._stats["languages"][node.language] = self._stats["languages"].get(node.language, 0) + 1
+    
+    def _directory_hash(self, children: list[TreeNode]) -> str:
+        """Hash a directory from its children's names and hashes."""
+        h = hashlib.sha256()
+        for child in children:
+            h.update(f"{child.name}\0{child.content_hash}\n".encode("utf-8"))
+        return h.hexdigest()
+    
+    def _index_file(
+        self,
+        repo_root: Path,
+        relative_path: str,
+        st: os.stat_result,
+        pending: list["_PendingFile"],
+    ) -> Optional[TreeNode]:
+        """
+        Index a single file.
+        
+        Returns the node if it can be reused or loaded from the parse cache.
+        Files that need parsing are appended to ``pending`` instead.
+        """
+        file_path = repo_root / relative_path
+        language = self._source_language(relative_path)
+        
+        previous = self._previous_files.get(relative_path)
+        if previous is not None and not previous.content_hash:
+            previous = None  # saved without hashes, can't be validated
+        
+        if previous and (previous.mtime_ns, previous.size) == (st.st_mtime_ns, st.st_size):
+            # Unchanged stat info - reuse without reading the file
+            return previous
         
-        # Check file size
         try:
-            if file_path.stat().st_size > self.config.index.max_file_size:
-                return None
+            data = file_path.read_bytes()
         except OSError:
             return None
+        digest = hashlib.sha256(data).hexdigest()
         
-        # Check if it's a supported language
-        language = self.parser.detect_language(file_path)
-        if not language:
-            return None
-        
-        if language not in self.config.index.languages:
-            return None
+        if previous and previous.content_hash == digest:
+            # Touched but unchanged content
+            previous.mtime_ns, previous.size = st.st_mtime_ns, st.st_size
+            self.restated_files += 1
+            return previous
         
-        # Parse the file
-        file_info = self.parser.parse_file(file_path)
+        file_info = self.parse_cache.get(digest, language) if self.parse_cache else None
         if not file_info:
+            pending.append(_PendingFile(file_path, relative_path, language, data, digest, st))
             return None
-        
-        # Update stats
-        self._stats["total_files"] += 1
-        self._stats["total_lines"] += file_info.line_count
-        self._stats["languages"][language] = self._stats["languages"].get(language, 0) + 1
-        
+        file_info.path = file_path
+        return self._file_node(file_info, relative_path, digest, st)
+    
+    def _file_node(
+        self, file_info: FileInfo, relative_path: str, digest: str, st: os.stat_result
+    ) -> TreeNode:
+        """Build the tree node for a parsed file."""
+        # Languages, imports and symbol names repeat across files; parse results
+        # arrive unpickled from workers or the cache, so intern them to share
+        # one string per distinct value
+        intern = sys.intern
         return TreeNode(
-            name=file_path.name,
+            name=file_info.path.name,
             type="file",
-            path=str(relative_path),
-            language=language,
-            imports=file_info.imports[:20],  # Limit imports
+            path=relative_path,
+            language=intern(file_info.language),
+            content_hash=digest,
+            imports=[intern(i) for i in file_info.imports[:20]],  # Limit imports
             functions=[
-                {
-                    "name": f.name,
-                    "signature": f.signature,
-                    "docstring": f.docstring,
-                    "line": f.start_line,
-                }
+                SymbolRef(intern(f.name), f.signature, f.docstring, f.start_line)
                 for f in file_info.functions[:50]  # Limit functions
             ],
             classes=[
-                {
-                    "name": c.name,
-                    "signature": c.signature,
-                    "docstring": c.docstring,
-                    "line": c.start_line,
-                }
+                SymbolRef(intern(c.name), c.signature, c.docstring, c.start_line)
                 for c in file_info.classes[:20]  # Limit classes
             ],
             variables=file_info.variables[:10],
             line_count=file_info.line_count,
+            mtime_ns=st.st_mtime_ns,
+            size=st.st_size,
         )
     
-    def _should_exclude(self, path: Path, repo_root: Path) -> bool:
-        """Check if a path should be excluded."""
-        name = path.name
+    def _parse_pending(self, pending: list["_PendingFile"]) -> list[Optional[FileInfo]]:
+        """Parse pending files, using a process pool for large batches."""
+        return self.parser.parse_files(
+            [item.path for item in pending],
+            [item.data for item in pending],
+            workers=self.config.index.parse_workers,
+        )
+    
+    def _should_exclude(self, path: str | os.PathLike, repo_root: Path) -> bool:
+        """
+        Check if a path should be excluded.
+        
+        Accepts any path-like, including the ``os.DirEntry`` objects of a
+        directory scan. Uses the filters compiled by ``_prepare_filters``.
+        """
+        path = os.fspath(path)
+        name = os.path.basename(path)
         
-        # Check exclude patterns
-        for pattern in self.config.index.exclude:
-            if name == pattern or name.startswith(pattern):
-                return True
-            if path.match(pattern):
-                return True
+        # Check exclude patterns as name prefixes (this includes exact names)
+        if name.startswith(self._exclude_prefixes):
+            return True
         
         # Skip hidden files/directories
         if name.startswith(".") and name not in (".github",):
             return True
         
+        # Check exclude patterns as globs
+        if self._exclude_name_re is not None and self._exclude_name_re.match(name):
+            return True
+        if self._exclude_globs:
+            pure_path = PurePath(path)
+            return any(pure_path.match(pattern) for pattern in self._exclude_globs)
+        
         return False
     
-    def save_index(self, index: CodeIndex, output_path: Path) -> None:
-        """Save index to a JSON file."""
+    def save_index(self, index: CodeIndex, output_path: Path, compress: bool = True) -> None:
+        """
+        Save index to a file: JSON for a .json path, zstd-compressed JSON for
+        a .json.zst path, the packed binary format otherwise (zstd-compressed
+        if ``compress`` and zstandard is installed).
+        
+        The data goes to a temporary file that then replaces ``output_path``,
+        so an interrupted save never leaves a truncated index behind.
+        """
+        name = output_path.name
+        if name.endswith(".json"):
+            data = index.to_json_bytes()
+        elif name.endswith(".json.zst"):
+            if zstandard is None:
+                raise ImportError("zstandard package not installed. Run: pip install zstandard")
+            data = zstandard.ZstdCompressor(level=3).compress(index.to_json_bytes())
+        else:
+            from .binindex import dump_index
+            data = dump_index(index)
+            if compress and zstandard is not None:
+                data = zstandard.ZstdCompressor(level=3).compress(data)
+        
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(index.to_json())
+        tmp_path = output_path.with_name(f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
     
     def load_index(self, index_path: Path) -> CodeIndex:
-        """Load index from a JSON file."""
-        with open(index_path, "r", encoding="utf-8") as f:
-            return CodeIndex.from_json(f.read())
+        """
+        Load index from a file saved in any of the formats.
+        
+        The file is memory-mapped rather than read, so its raw bytes are not
+        copied onto the heap; decoded JSON and decompressed data are turned
+        into tree nodes after the mapping is closed.
+        """
+        from .binindex import MAGIC, load_index as load_binary
+        
+        with open(index_path, "rb") as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Index file is empty: {index_path}") from None
+        
+        with buffer:
+            magic = buffer[:len(MAGIC)]
+            if magic == MAGIC:
+                return load_binary(buffer)
+            if magic == ZSTD_MAGIC:
+                if zstandard is None:
+                    raise ImportError("zstandard package not installed. Run: pip install zstandard")
+                packed = zstandard.ZstdDecompressor().decompress(buffer)
+                if packed[:len(MAGIC)] != MAGIC:
+                    data = (orjson.loads if orjson is not None else json.loads)(packed)
+                    packed = None
+            else:
+                packed = None
+                if orjson is None:
+                    data = json.loads(buffer[:])
+                else:
+                    with memoryview(buffer) as view:
+                        data = orjson.loads(view)
+        
+        if packed is not None:
+            return load_binary(packed)
+        return CodeIndex.from_dict(data)
+
+
+@dataclass
+class _PendingFile:
+    """A file whose content needs to be parsed."""
+    path: Path
+    relative_path: str
+    language: str
+    data: bytes
+    digest: str
+    st: os.stat_result
+
+
+def _iter_file_nodes(node: TreeNode):
+    """Yield all file nodes under a tree node, in tree order."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.type == "file":
+            yield current
+        else:
+            stack.extend(reversed(current.children))
@@ -1,7 +1,9 @@
 """LLM client abstraction for multiple providers."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from functools import lru_cache
+from typing import Iterator, Optional
 import json
 
 from .config import LLMConfig
@@ -14,6 +16,77 @@ class LLMClient(ABC):
     def chat(self, messages: list[dict], **kwargs) -> str:
         """Send chat messages and get response."""
         pass
+    
+    def stream_chat(self, messages: list[dict], **kwargs) -> Iterator[str]:
+        """Send chat messages and yield the response as it is generated."""
+        yield self.chat(messages, **kwargs)
+    
+    async def achat(self, messages: list[dict], **kwargs) -> str:
+        """Send chat messages without blocking the event loop."""
+        return await asyncio.to_thread(self.chat, messages, **kwargs)
+    
+    async def abatch(self, conversations: list[list[dict]], **kwargs) -> list[str]:
+        """Send several independent conversations concurrently."""
+        return list(await asyncio.gather(*(self.achat(m, **kwargs) for m in conversations)))
+
+
+def _http_client(asynchronous: bool = False):
+    """
+    Create an httpx client (or AsyncClient) for the provider SDKs.
+    
+    Uses HTTP/2 when the h2 package is installed, and keeps idle connections
+    open so consecutive requests skip the TCP and TLS handshakes.
+    """
+    import httpx
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    client = httpx.AsyncClient if asynchronous else httpx.Client
+    return client(
+        http2=http2,
+        timeout=httpx.Timeout(600.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=8),
+        follow_redirects=True,
+    )
+
+
+# SDK clients are shared between LLMClient instances with the same credentials,
+# so every retriever reuses one connection pool per endpoint
+@lru_cache(maxsize=8)
+def _openai_sdk_client(api_key: Optional[str], base_url: Optional[str]):
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=_http_client())
+
+
+@lru_cache(maxsize=8)
+def _anthropic_sdk_client(api_key: Optional[str]):
+    import anthropic
+    return anthropic.Anthropic(api_key=api_key, http_client=_http_client())
+
+
+# Async SDK clients are shared the same way, but per event loop: their pooled
+# connections belong to the loop they were opened on, and a later asyncio.run()
+# (or abatch from another loop) must not reuse them
+@lru_cache(maxsize=8)
+def _async_openai_sdk_client(
+    loop: asyncio.AbstractEventLoop, api_key: Optional[str], base_url: Optional[str]
+):
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=_http_client(True))
+
+
+@lru_cache(maxsize=8)
+def _async_anthropic_sdk_client(loop: asyncio.AbstractEventLoop, api_key: Optional[str]):
+    import anthropic
+    return anthropic.AsyncAnthropic(api_key=api_key, http_client=_http_client(True))
+
+
+@lru_cache(maxsize=1)
+def _requests_session():
+    import requests
+    return requests.Session()
 
 
 class OpenAIClient(LLMClient):
@@ -22,21 +95,35 @@ class OpenAIClient(LLMClient):
     def __init__(self, config: LLMConfig):
         self.config = config
         try:
-            from openai import OpenAI
-            self.client = OpenAI(
-                api_key=config.api_key,
-                base_url=config.base_url,
-            )
+            self.client = _openai_sdk_client(config.api_key, config.base_url)
         except ImportError:
             raise ImportError("openai package not installed. Run: pip install openai")
     
+    def _params(self, messages: list[dict], kwargs: dict) -> dict:
+        return {
+            "model": self.config.model,
+            "messages": messages,
+            "temperature": kwargs.get("temperature", self.config.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+        }
+    
     def chat(self, messages: list[dict], **kwargs) -> str:
-        response = self.client.chat.completions.create(
-            model=self.config.model,
-            messages=messages,
-            temperature=kwargs.get("temperature", self.config.temperature),
-            max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
+        response = self.client.chat.completions.create(**self._params(messages, kwargs))
+        return response.choices[0].message.content or ""
+    
+    def stream_chat(self, messages: list[dict], **kwargs) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            **self._params(messages, kwargs), stream=True
         )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def achat(self, messages: list[dict], **kwargs) -> str:
+        client = _async_openai_sdk_client(
+            asyncio.get_running_loop(), self.config.api_key, self.config.base_url
+        )
+        response = await client.chat.completions.create(**self._params(messages, kwargs))
         return response.choices[0].message.content or ""
 
 
@@ -46,12 +133,11 @@ class AnthropicClient(LLMClient):
     def __init__(self, config: LLMConfig):
         self.config = config
         try:
-            import anthropic
-            self.client = anthropic.Anthropic(api_key=config.api_key)
+            self.client = _anthropic_sdk_client(config.api_key)
         except ImportError:
             raise ImportError("anthropic package not installed. Run: pip install anthropic")
     
-    def chat(self, messages: list[dict], **kwargs) -> str:
+    def _params(self, messages: list[dict], kwargs: dict) -> dict:
         # Convert messages format
         system = ""
         chat_messages = []
@@ -62,13 +148,25 @@ class AnthropicClient(LLMClient):
             else:
                 chat_messages.append(msg)
         
-        response = self.client.messages.create(
-            model=self.config.model,
-            system=system,
-            messages=chat_messages,
-            temperature=kwargs.get("temperature", self.config.temperature),
-            max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
-        )
+        return {
+            "model": self.config.model,
+            "system": system,
+            "messages": chat_messages,
+            "temperature": kwargs.get("temperature", self.config.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+        }
+    
+    def chat(self, messages: list[dict], **kwargs) -> str:
+        response = self.client.messages.create(**self._params(messages, kwargs))
+        return response.content[0].text
+    
+    def stream_chat(self, messages: list[dict], **kwargs) -> Iterator[str]:
+        with self.client.messages.stream(**self._params(messages, kwargs)) as stream:
+            yield from stream.text_stream
+    
+    async def achat(self, messages: list[dict], **kwargs) -> str:
+        client = _async_anthropic_sdk_client(asyncio.get_running_loop(), self.config.api_key)
+        response = await client.messages.create(**self._params(messages, kwargs))
         return response.content[0].text
 
 
@@ -88,9 +186,8 @@ class OllamaClient(LLMClient):
             )
             return response["message"]["content"]
         except ImportError:
-            # Fallback to requests
-            import requests
-            response = requests.post(
+            # Fallback to requests, over a shared keep-alive session
+            response = _requests_session().post(
                 f"{self.base_url}/api/chat",
                 json={
                     "model": self.config.model,
@@ -100,6 +197,28 @@ class OllamaClient(LLMClient):
             )
             response.raise_for_status()
             return response.json()["message"]["content"]
+    
+    def stream_chat(self, messages: list[dict], **kwargs) -> Iterator[str]:
+        try:
+            import ollama
+        except ImportError:
+            ollama = None
+        
+        if ollama is not None:
+            for chunk in ollama.chat(model=self.config.model, messages=messages, stream=True):
+                yield chunk["message"]["content"]
+            return
+        
+        # The API streams one JSON object per line
+        with _requests_session().post(
+            f"{self.base_url}/api/chat",
+            json={"model": self.config.model, "messages": messages, "stream": True},
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)["message"]["content"]
 
 
 def create_llm_client(config: LLMConfig) -> LLMClient:
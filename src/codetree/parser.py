@@ -1,10 +1,27 @@
-"""Code parser using tree-sitter for AST extraction."""
+"""Code parser extracting structure information with regular expressions."""
 
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 from typing import Optional
 
+# Bump whenever parse output changes, so cached parse results are invalidated
+PARSER_VERSION = "5"
+
+# Minimum number of files to parse before a process pool is used
+PARALLEL_PARSE_THRESHOLD = 64
+
+# Pool workers are never forked from the caller: builds also run in threads
+# (build_index_async), and forking a multi-threaded process can deadlock
+_POOL_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
 # Language file extensions mapping
 LANGUAGE_EXTENSIONS = {
     "python": [".py", ".pyi"],
@@ -17,8 +34,85 @@ LANGUAGE_EXTENSIONS = {
     "cpp": [".cpp", ".hpp", ".cc", ".cxx"],
 }
 
-
-@dataclass
+# Extension -> language, so detection is one dict lookup per file
+_EXT_TO_LANG: dict[str, str] = {}
+for _lang, _extensions in LANGUAGE_EXTENSIONS.items():
+    for _ext in _extensions:
+        _EXT_TO_LANG.setdefault(_ext, _lang)
+
+# Compiled once per process (including parse pool workers) and shared by all files
+# One scan per Python file: each match is an import, function, class or
+# module-level variable, told apart by the name of the branch that matched
+_PY_DECORATORS = r"(?:@[\w.]+(?:\([^)]*\))?\s*\n)*"
+_PY_SCAN_RE = re.compile(
+    r"^(?:(?P<import>(?:from\s+[\w.]+\s+)?import\s+.+)"
+    rf"|(?P<function>(?P<func_decorators>{_PY_DECORATORS})"
+    r"(?P<async>async\s+)?def\s+(?P<func_name>\w+)\s*\((?P<params>[^)]*)\))"
+    rf"|(?P<class>(?P<class_decorators>{_PY_DECORATORS})"
+    r"class\s+(?P<class_name>\w+)(?:\((?P<bases>[^)]*)\))?:)"
+    r"|(?P<variable>(?P<var_name>[A-Z][A-Z_0-9]*)\s*=))",
+    re.MULTILINE
+)
+
+_JS_IMPORT_RE = re.compile(r"^(?:import|export)\s+.+?['\"];?$", re.MULTILINE)
+_JS_FUNC_DECL_RE = re.compile(r"(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)")
+_JS_ARROW_RE = re.compile(r"(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?\([^)]*\)\s*=>")
+_JS_CLASS_RE = re.compile(r"(?:export\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?")
+
+_GO_IMPORT_RE = re.compile(r'import\s+(?:\(\s*([^)]+)\s*\)|"([^"]+)")')
+_GO_FUNC_RE = re.compile(r"func\s+(?:\([^)]+\)\s+)?(\w+)\s*\(([^)]*)\)")
+
+_RUST_USE_RE = re.compile(r"^use\s+.+;", re.MULTILINE)
+_RUST_FN_RE = re.compile(r"(?:pub\s+)?(?:async\s+)?fn\s+(\w+)\s*(?:<[^>]+>)?\s*\(([^)]*)\)")
+
+_JAVA_IMPORT_RE = re.compile(r"^import\s+.+;", re.MULTILINE)
+_JAVA_CLASS_RE = re.compile(r"(?:public\s+)?(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(?:\w+))?")
+# Anchored at a word start: unanchored, every offset inside a long word or
+# whitespace run retried the whole pattern, which was quadratic. Kept apart
+# from the other two: its parameter list may span lines, so in one
+# alternation an unclosed "(" (say, in a comment) swallowed the classes after it
+_JAVA_METHOD_RE = re.compile(
+    r"\b(?:(?:public|private|protected)\s+)?(?:static\s+)?\w+\s+(\w+)\s*\((?:[^)]*)\)"
+)
+# Keywords the method pattern can capture as a "name" before a parenthesis
+_JAVA_NON_METHOD_KEYWORDS = frozenset({
+    "if", "while", "for", "switch", "catch", "try", "return", "synchronized", "new", "else", "do",
+})
+
+
+class _LineCounter:
+    """
+    Line numbers of offsets into a text, counted incrementally.
+    
+    Matches of one pattern come in ascending order, so each call only counts
+    the newlines since the previous offset; an earlier offset (the next
+    pattern's first match) restarts from the top.
+    """
+
+    __slots__ = ("text", "pos", "line")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.line = 1
+
+    def __call__(self, pos: int) -> int:
+        if pos < self.pos:
+            self.pos, self.line = 0, 1
+        self.line += self.text.count("\n", self.pos, pos)
+        self.pos = pos
+        return self.line
+
+
+def decode_source(data: bytes) -> str:
+    """Decode file bytes as UTF-8 with universal newlines (like read_text)."""
+    content = data.decode("utf-8")
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+
+@dataclass(slots=True)
 class CodeEntity:
     """Represents a code entity (function, class, etc.)."""
     name: str
@@ -27,11 +121,12 @@ class CodeEntity:
     end_line: int
     docstring: Optional[str] = None
     signature: Optional[str] = None
-    decorators: list[str] = field(default_factory=list)
-    children: list["CodeEntity"] = field(default_factory=list)
+    # None when empty: most entities have neither, and there are many entities
+    decorators: Optional[list[str]] = None
+    children: Optional[list["CodeEntity"]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FileInfo:
     """Parsed information about a code file."""
     path: Path
@@ -47,16 +142,22 @@ class FileInfo:
 class CodeParser:
     """Parse code files to extract structure information."""
 
-    def __init__(self):
-        self._parsers = {}
+    def __init__(self, max_file_size: Optional[int] = None):
+        # Files read by parse_file itself are skipped above this many bytes
+        self.max_file_size = max_file_size
+        # Language -> parse method, each called as (file_path, content)
+        self._parsers = {
+            "python": self._parse_python,
+            "javascript": partial(self._parse_javascript, language="javascript"),
+            "typescript": partial(self._parse_javascript, language="typescript"),
+            "go": self._parse_go,
+            "rust": self._parse_rust,
+            "java": self._parse_java,
+        }
 
     def detect_language(self, file_path: Path) -> Optional[str]:
         """Detect programming language from file extension."""
-        suffix = file_path.suffix.lower()
-        for lang, extensions in LANGUAGE_EXTENSIONS.items():
-            if suffix in extensions:
-                return lang
-        return None
+        return _EXT_TO_LANG.get(file_path.suffix.lower())
 
     def parse_file(self, file_path: Path, content: Optional[str] = None) -> Optional[FileInfo]:
         """Parse a code file and extract structure information."""
@@ -66,104 +167,116 @@ class CodeParser:
 
         if content is None:
             try:
-                content = file_path.read_text(encoding="utf-8")
+                if self.max_file_size is not None and file_path.stat().st_size > self.max_file_size:
+                    return None
+                content = decode_source(file_path.read_bytes())
             except (UnicodeDecodeError, IOError):
                 return None
 
-        lines = content.split("\n")
+        # Regex-based parsing: anchored single-pass scans outrun a full tree-sitter parse
+        parse = self._parsers.get(language)
+        if parse is not None:
+            return parse(file_path, content)
         
-        # Use regex-based parsing for now (simpler than tree-sitter for MVP)
-        if language == "python":
-            return self._parse_python(file_path, content, lines)
-        elif language in ("javascript", "typescript"):
-            return self._parse_javascript(file_path, content, lines, language)
-        elif language == "go":
-            return self._parse_go(file_path, content, lines)
-        elif language == "rust":
-            return self._parse_rust(file_path, content, lines)
-        elif language == "java":
-            return self._parse_java(file_path, content, lines)
-        else:
-            # Basic fallback
-            return FileInfo(
-                path=file_path,
-                language=language,
-                line_count=len(lines),
-            )
-
-    def _parse_python(self, file_path: Path, content: str, lines: list[str]) -> FileInfo:
+        # Basic fallback
+        return FileInfo(
+            path=file_path,
+            language=language,
+            line_count=content.count("\n") + 1,
+        )
+
+    def parse_files(
+        self,
+        paths: list[Path],
+        sources: Optional[list[bytes]] = None,
+        workers: int = 0,
+    ) -> list[Optional[FileInfo]]:
+        """
+        Parse many files, using a process pool for large batches.
+        
+        ``sources`` optionally gives each file's raw bytes, decoded like
+        files read from disk; otherwise the files are read by the workers.
+        ``workers`` is the number of processes, 0 meaning one per CPU.
+        Results are in the order of ``paths``.
+        """
+        if sources is None:
+            sources = [None] * len(paths)
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(paths) < PARALLEL_PARSE_THRESHOLD:
+            return [_parse_with(self, path, data) for path, data in zip(paths, sources)]
+        
+        # Enough chunks per worker to balance uneven files, capped to keep IPC batched
+        chunksize = max(1, min(32, len(paths) // (workers * 4)))
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(_POOL_START_METHOD),
+                initializer=_init_worker,
+                initargs=(self.max_file_size,),
+            ) as executor:
+                return list(executor.map(_parse_in_worker, paths, sources, chunksize=chunksize))
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            # No usable process pool here (e.g. no semaphores) - parse in-process
+            return [_parse_with(self, path, data) for path, data in zip(paths, sources)]
+
+    def _parse_python(self, file_path: Path, content: str) -> FileInfo:
         """Parse Python file."""
+        line_at = _LineCounter(content)
         imports = []
         functions = []
         classes = []
         variables = []
 
-        # Extract imports
-        import_pattern = re.compile(r"^(?:from\s+[\w.]+\s+)?import\s+.+", re.MULTILINE)
-        for match in import_pattern.finditer(content):
-            imports.append(match.group().strip())
-
-        # Extract functions
-        func_pattern = re.compile(
-            r"^(?P<decorators>(?:@[\w.]+(?:\([^)]*\))?\s*\n)*)"
-            r"(?P<async>async\s+)?def\s+(?P<name>\w+)\s*\((?P<params>[^)]*)\)",
-            re.MULTILINE
-        )
-        for match in func_pattern.finditer(content):
-            start_line = content[:match.start()].count("\n") + 1
-            name = match.group("name")
-            signature = f"def {name}({match.group('params')})"
-            if match.group("async"):
-                signature = "async " + signature
-            
-            decorators = []
-            if match.group("decorators"):
-                decorators = [d.strip() for d in match.group("decorators").strip().split("\n") if d.strip()]
-            
-            # Find docstring
-            docstring = self._extract_python_docstring(content, match.end())
-            
-            functions.append(CodeEntity(
-                name=name,
-                type="function",
-                start_line=start_line,
-                end_line=start_line,  # Simplified
-                signature=signature,
-                decorators=decorators,
-                docstring=docstring,
-            ))
-
-        # Extract classes
-        class_pattern = re.compile(
-            r"^(?P<decorators>(?:@[\w.]+(?:\([^)]*\))?\s*\n)*)"
-            r"class\s+(?P<name>\w+)(?:\((?P<bases>[^)]*)\))?:",
-            re.MULTILINE
-        )
-        for match in class_pattern.finditer(content):
-            start_line = content[:match.start()].count("\n") + 1
-            name = match.group("name")
-            bases = match.group("bases") or ""
-            
-            decorators = []
-            if match.group("decorators"):
-                decorators = [d.strip() for d in match.group("decorators").strip().split("\n") if d.strip()]
-            
-            docstring = self._extract_python_docstring(content, match.end())
-            
-            classes.append(CodeEntity(
-                name=name,
-                type="class",
-                start_line=start_line,
-                end_line=start_line,  # Simplified
-                signature=f"class {name}({bases})" if bases else f"class {name}",
-                decorators=decorators,
-                docstring=docstring,
-            ))
-
-        # Extract module-level variables (simplified)
-        var_pattern = re.compile(r"^([A-Z][A-Z_0-9]*)\s*=", re.MULTILINE)
-        for match in var_pattern.finditer(content):
-            variables.append(match.group(1))
+        for match in _PY_SCAN_RE.finditer(content):
+            kind = match.lastgroup
+            if kind == "import":
+                imports.append(match.group().strip())
+            elif kind == "function":
+                start_line = line_at(match.start())
+                name = match.group("func_name")
+                signature = f"def {name}({match.group('params')})"
+                if match.group("async"):
+                    signature = "async " + signature
+                
+                decorators = None
+                if match.group("func_decorators"):
+                    decorators = [d.strip() for d in match.group("func_decorators").strip().split("\n") if d.strip()]
+                
+                # Find docstring
+                docstring = self._extract_python_docstring(content, match.end())
+                
+                functions.append(CodeEntity(
+                    name=name,
+                    type="function",
+                    start_line=start_line,
+                    end_line=start_line,  # Simplified
+                    signature=signature,
+                    decorators=decorators,
+                    docstring=docstring,
+                ))
+            elif kind == "class":
+                start_line = line_at(match.start())
+                name = match.group("class_name")
+                bases = match.group("bases") or ""
+                
+                decorators = None
+                if match.group("class_decorators"):
+                    decorators = [d.strip() for d in match.group("class_decorators").strip().split("\n") if d.strip()]
+                
+                docstring = self._extract_python_docstring(content, match.end())
+                
+                classes.append(CodeEntity(
+                    name=name,
+                    type="class",
+                    start_line=start_line,
+                    end_line=start_line,  # Simplified
+                    signature=f"class {name}({bases})" if bases else f"class {name}",
+                    decorators=decorators,
+                    docstring=docstring,
+                ))
+            else:
+                # Module-level variables (simplified)
+                variables.append(match.group("var_name"))
 
         return FileInfo(
             path=file_path,
@@ -172,39 +285,44 @@ class CodeParser:
             functions=functions,
             classes=classes,
             variables=variables,
-            line_count=len(lines),
+            line_count=content.count("\n") + 1,
         )
 
     def _extract_python_docstring(self, content: str, pos: int) -> Optional[str]:
         """Extract Python docstring after a definition."""
-        remaining = content[pos:pos + 500]
-        # Look for triple-quoted string
-        match = re.search(r'^\s*:\s*\n\s*("""|\'\'\')(.+?)\1', remaining, re.DOTALL)
-        if match:
-            return match.group(2).strip()[:200]  # Truncate
-        return None
+        # Look for a triple-quoted string within the next 500 characters: the
+        # header's colon, whitespace including a newline, then the quotes
+        head = content[pos:pos + 500].lstrip()
+        if not head.startswith(":"):
+            return None
+        after_colon = head[1:]
+        body = after_colon.lstrip()
+        if "\n" not in after_colon[:len(after_colon) - len(body)]:
+            return None
+        quote = body[:3]
+        if quote != '"""' and quote != "'''":
+            return None
+        end = body.find(quote, 4)
+        if end < 0:
+            return None
+        return body[3:end].strip()[:200]  # Truncate
 
-    def _parse_javascript(self, file_path: Path, content: str, lines: list[str], language: str) -> FileInfo:
+    def _parse_javascript(self, file_path: Path, content: str, language: str) -> FileInfo:
         """Parse JavaScript/TypeScript file."""
+        line_at = _LineCounter(content)
         imports = []
         functions = []
         classes = []
 
         # Extract imports
-        import_pattern = re.compile(r"^(?:import|export)\s+.+?['\"];?$", re.MULTILINE)
-        for match in import_pattern.finditer(content):
+        for match in _JS_IMPORT_RE.finditer(content):
             imports.append(match.group().strip())
 
         # Extract functions
-        func_patterns = [
-            # function declaration
-            re.compile(r"(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)"),
-            # arrow function with const
-            re.compile(r"(?:export\s+)?const\s+(\w+)\s*=\s*(?:async\s+)?\([^)]*\)\s*=>"),
-        ]
-        for pattern in func_patterns:
+        # function declarations, then arrow functions assigned to const
+        for pattern in (_JS_FUNC_DECL_RE, _JS_ARROW_RE):
             for match in pattern.finditer(content):
-                start_line = content[:match.start()].count("\n") + 1
+                start_line = line_at(match.start())
                 name = match.group(1)
                 functions.append(CodeEntity(
                     name=name,
@@ -214,9 +332,8 @@ class CodeParser:
                 ))
 
         # Extract classes
-        class_pattern = re.compile(r"(?:export\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?")
-        for match in class_pattern.finditer(content):
-            start_line = content[:match.start()].count("\n") + 1
+        for match in _JS_CLASS_RE.finditer(content):
+            start_line = line_at(match.start())
             name = match.group(1)
             extends = match.group(2)
             classes.append(CodeEntity(
@@ -233,17 +350,17 @@ class CodeParser:
             imports=imports,
             functions=functions,
             classes=classes,
-            line_count=len(lines),
+            line_count=content.count("\n") + 1,
         )
 
-    def _parse_go(self, file_path: Path, content: str, lines: list[str]) -> FileInfo:
+    def _parse_go(self, file_path: Path, content: str) -> FileInfo:
         """Parse Go file."""
+        line_at = _LineCounter(content)
         imports = []
         functions = []
 
         # Extract imports
-        import_pattern = re.compile(r'import\s+(?:\(\s*([^)]+)\s*\)|"([^"]+)")')
-        for match in import_pattern.finditer(content):
+        for match in _GO_IMPORT_RE.finditer(content):
             if match.group(1):
                 for line in match.group(1).strip().split("\n"):
                     line = line.strip().strip('"')
@@ -253,9 +370,8 @@ class CodeParser:
                 imports.append(match.group(2))
 
         # Extract functions
-        func_pattern = re.compile(r"func\s+(?:\([^)]+\)\s+)?(\w+)\s*\(([^)]*)\)")
-        for match in func_pattern.finditer(content):
-            start_line = content[:match.start()].count("\n") + 1
+        for match in _GO_FUNC_RE.finditer(content):
+            start_line = line_at(match.start())
             name = match.group(1)
             params = match.group(2)
             functions.append(CodeEntity(
@@ -271,23 +387,22 @@ class CodeParser:
             language="go",
             imports=imports,
             functions=functions,
-            line_count=len(lines),
+            line_count=content.count("\n") + 1,
         )
 
-    def _parse_rust(self, file_path: Path, content: str, lines: list[str]) -> FileInfo:
+    def _parse_rust(self, file_path: Path, content: str) -> FileInfo:
         """Parse Rust file."""
+        line_at = _LineCounter(content)
         imports = []
         functions = []
 
         # Extract use statements
-        use_pattern = re.compile(r"^use\s+.+;", re.MULTILINE)
-        for match in use_pattern.finditer(content):
+        for match in _RUST_USE_RE.finditer(content):
             imports.append(match.group().strip())
 
         # Extract functions
-        func_pattern = re.compile(r"(?:pub\s+)?(?:async\s+)?fn\s+(\w+)\s*(?:<[^>]+>)?\s*\(([^)]*)\)")
-        for match in func_pattern.finditer(content):
-            start_line = content[:match.start()].count("\n") + 1
+        for match in _RUST_FN_RE.finditer(content):
+            start_line = line_at(match.start())
             name = match.group(1)
             functions.append(CodeEntity(
                 name=name,
@@ -301,40 +416,32 @@ class CodeParser:
             language="rust",
             imports=imports,
             functions=functions,
-            line_count=len(lines),
+            line_count=content.count("\n") + 1,
         )
 
-    def _parse_java(self, file_path: Path, content: str, lines: list[str]) -> FileInfo:
+    def _parse_java(self, file_path: Path, content: str) -> FileInfo:
         """Parse Java file."""
+        line_at = _LineCounter(content)
         imports = []
         functions = []
         classes = []
 
-        # Extract imports
-        import_pattern = re.compile(r"^import\s+.+;", re.MULTILINE)
-        for match in import_pattern.finditer(content):
+        for match in _JAVA_IMPORT_RE.finditer(content):
             imports.append(match.group().strip())
 
-        # Extract classes
-        class_pattern = re.compile(r"(?:public\s+)?(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?")
-        for match in class_pattern.finditer(content):
-            start_line = content[:match.start()].count("\n") + 1
-            name = match.group(1)
+        for match in _JAVA_CLASS_RE.finditer(content):
+            start_line = line_at(match.start())
             classes.append(CodeEntity(
-                name=name,
+                name=match.group(1),
                 type="class",
                 start_line=start_line,
                 end_line=start_line,
             ))
 
-        # Extract methods
-        method_pattern = re.compile(
-            r"(?:public|private|protected)?\s*(?:static\s+)?(?:\w+)\s+(\w+)\s*\(([^)]*)\)"
-        )
-        for match in method_pattern.finditer(content):
+        for match in _JAVA_METHOD_RE.finditer(content):
             name = match.group(1)
-            if name not in ("if", "while", "for", "switch", "catch"):
-                start_line = content[:match.start()].count("\n") + 1
+            if name not in _JAVA_NON_METHOD_KEYWORDS:
+                start_line = line_at(match.start())
                 functions.append(CodeEntity(
                     name=name,
                     type="method",
@@ -348,5 +455,30 @@ class CodeParser:
             imports=imports,
             functions=functions,
             classes=classes,
-            line_count=len(lines),
+            line_count=content.count("\n") + 1,
         )
+
+
+# Parser instance of a pool worker process
+_worker_parser: Optional[CodeParser] = None
+
+
+def _init_worker(max_file_size: Optional[int]) -> None:
+    global _worker_parser
+    _worker_parser = CodeParser(max_file_size)
+
+
+def _parse_with(parser: CodeParser, file_path: Path, data: Optional[bytes]) -> Optional[FileInfo]:
+    """Decode and parse file content, or read the file if ``data`` is None."""
+    if data is None:
+        return parser.parse_file(file_path)
+    try:
+        content = decode_source(data)
+    except UnicodeDecodeError:
+        return None
+    return parser.parse_file(file_path, content)
+
+
+def _parse_in_worker(file_path: Path, data: Optional[bytes]) -> Optional[FileInfo]:
+    """Parse a file in a pool worker process."""
+    return _parse_with(_worker_parser, file_path, data)
@@ -1,11 +1,13 @@
 """Reasoning-based code retriever."""
 
+import asyncio
 import json
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from .config import Config
-from .indexer import CodeIndex, TreeNode
+from .indexer import CodeIndex
 from .llm import create_llm_client, LLMClient
 
 
@@ -47,6 +49,13 @@ Guidelines:
 - Use markdown formatting for code blocks"""
 
 
+# Retrieval responses kept per retriever for repeated queries
+RETRIEVAL_CACHE_SIZE = 256
+
+# Finds the JSON object in a retrieval response that also contains prose
+_JSON_DECODER = json.JSONDecoder()
+
+
 class CodeRetriever:
     """Retrieves relevant code using LLM reasoning."""
     
@@ -55,14 +64,50 @@ class CodeRetriever:
         self.config = config or Config.load()
         self.llm = create_llm_client(self.config.llm)
         self.repo_path = Path(index.repo_path)
+        # (query, tree) -> LLM retrieval response, least recently used first
+        self._retrieval_cache: OrderedDict[tuple[str, str], str] = OrderedDict()
     
     def retrieve(self, query: str, max_files: int = 5) -> list[dict]:
         """Retrieve relevant files for a query using LLM reasoning."""
-        # Get compact tree representation
-        tree_str = self.index.get_compact_tree(max_depth=4)
-        
-        # Ask LLM to identify relevant files
-        messages = [
+        key = self._retrieval_key(query)
+        response = self._retrieval_cache.get(key)
+        if response is None:
+            response = self.llm.chat(self._retrieval_messages(*key))
+            self._cache_retrieval(key, response)
+        else:
+            self._retrieval_cache.move_to_end(key)
+        return self._parse_relevant_files(response, max_files)
+    
+    async def aretrieve(self, query: str, max_files: int = 5) -> list[dict]:
+        """Retrieve relevant files for a query without blocking the event loop."""
+        key = self._retrieval_key(query)
+        response = self._retrieval_cache.get(key)
+        if response is None:
+            response = await self.llm.achat(self._retrieval_messages(*key))
+            self._cache_retrieval(key, response)
+        else:
+            self._retrieval_cache.move_to_end(key)
+        return self._parse_relevant_files(response, max_files)
+    
+    def _retrieval_key(self, query: str) -> tuple[str, str]:
+        """
+        Key retrieval responses by the query and the tree shown to the LLM.
+        
+        Misses whenever the tree changes. Keying by the whole tree string is
+        cheap only because get_compact_tree returns the same cached str object
+        until then, and a str memoizes its own hash; a freshly rendered tree
+        would be hashed in full (and compared) on every lookup.
+        """
+        return query.strip(), self.index.get_compact_tree(max_depth=4)
+    
+    def _cache_retrieval(self, key: tuple[str, str], response: str) -> None:
+        self._retrieval_cache[key] = response
+        if len(self._retrieval_cache) > RETRIEVAL_CACHE_SIZE:
+            self._retrieval_cache.popitem(last=False)
+    
+    def _retrieval_messages(self, query: str, tree_str: str) -> list[dict]:
+        """Build the messages asking the LLM to identify relevant files."""
+        return [
             {"role": "system", "content": RETRIEVAL_SYSTEM_PROMPT},
             {"role": "user", "content": f"""## Repository Structure
 
@@ -73,19 +118,20 @@ class CodeRetriever:
 
 Analyze the repository structure and identify the most relevant files to answer this question. Return JSON."""}
         ]
-        
-        response = self.llm.chat(messages)
-        
-        # Parse response
-        try:
-            # Extract JSON from response
-            json_start = response.find("{")
-            json_end = response.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                result = json.loads(response[json_start:json_end])
-                return result.get("relevant_files", [])[:max_files]
-        except json.JSONDecodeError:
-            pass
+    
+    def _parse_relevant_files(self, response: str, max_files: int) -> list[dict]:
+        """Parse the relevant files out of the LLM's retrieval response."""
+        # Decode the first JSON object in the response, skipping braces in
+        # any prose before it; raw_decode stops at the object's end, so text
+        # or further blocks after it don't matter
+        start = response.find("{")
+        while start >= 0:
+            try:
+                result, _ = _JSON_DECODER.raw_decode(response, start)
+            except json.JSONDecodeError:
+                start = response.find("{", start + 1)
+                continue
+            return result.get("relevant_files", [])[:max_files]
         
         return []
     
@@ -103,9 +149,13 @@ Analyze the repository structure and identify the most relevant files to answer
         
         # If no focus specified, return full content (truncated)
         if not focus:
-            lines = content.split("\n")
-            if len(lines) > 200:
-                return "\n".join(lines[:200]) + f"\n\n... ({len(lines) - 200} more lines)"
+            line_count = content.count("\n") + 1
+            if line_count > 200:
+                # Cut at the 200th newline without splitting the whole file
+                end = -1
+                for _ in range(200):
+                    end = content.find("\n", end + 1)
+                return content[:end] + f"\n\n... ({line_count - 200} more lines)"
             return content
         
         # TODO: Extract only focused sections
@@ -116,77 +166,67 @@ Analyze the repository structure and identify the most relevant files to answer
         """Query the codebase and get an answer."""
         # Step 1: Retrieve relevant files
         relevant_files = self.retrieve(question)
+        messages = self._answer_messages(question, relevant_files)
+        if isinstance(messages, str):
+            return messages
+        
+        # Step 3: Generate answer
+        return self.llm.chat(messages)
+    
+    async def aquery(self, question: str) -> str:
+        """Query the codebase without blocking the event loop."""
+        relevant_files = await self.aretrieve(question)
+        messages = await asyncio.to_thread(self._answer_messages, question, relevant_files)
+        if isinstance(messages, str):
+            return messages
+        return await self.llm.achat(messages)
+    
+    def stream_query(self, question: str) -> Iterator[str]:
+        """Query the codebase, yielding the answer as it is generated."""
+        relevant_files = self.retrieve(question)
+        messages = self._answer_messages(question, relevant_files)
+        if isinstance(messages, str):
+            yield messages
+            return
+        yield from self.llm.stream_chat(messages)
+    
+    def _answer_messages(self, question: str, relevant_files: list[dict]) -> list[dict] | str:
+        """
+        Build the messages asking the LLM to answer from the relevant files.
         
+        Returns a message for the user instead if there is nothing to answer from.
+        """
         if not relevant_files:
             return "I couldn't identify any relevant files for your question. Please try rephrasing or being more specific."
         
-        # Step 2: Get file contents
-        context_parts = []
+        # Step 2: Get file contents. The prompt is assembled from segments
+        # with one join, so each file's content is copied only once
+        segments = ["## Relevant Code\n\n"]
         for file_info in relevant_files:
             path = file_info.get("path", "")
             focus = file_info.get("focus", [])
             
             content = self.get_file_content(path, focus)
             if content:
-                context_parts.append(f"## File: {path}\n\n```\n{content}\n```")
+                if len(segments) > 1:
+                    segments.append("\n\n")
+                segments += ("## File: ", path, "\n\n```\n", content, "\n```")
         
-        if not context_parts:
+        if len(segments) == 1:
             return "I found relevant files but couldn't read their contents."
         
-        # Step 3: Generate answer
-        context = "\n\n".join(context_parts)
+        segments += (
+            "\n\n## Question\n",
+            question,
+            "\n\nPlease answer the question based on the code provided above.",
+        )
         
-        messages = [
+        return [
             {"role": "system", "content": ANSWER_SYSTEM_PROMPT},
-            {"role": "user", "content": f"""## Relevant Code
-
-{context}
-
-## Question
-{question}
-
-Please answer the question based on the code provided above."""}
+            {"role": "user", "content": "".join(segments)},
         ]
-        
-        return self.llm.chat(messages)
     
     def find_references(self, symbol: str) -> list[dict]:
         """Find all references to a symbol across the codebase."""
-        references = []
-        
-        def search_node(node: TreeNode):
-            if node.type == "file":
-                # Check functions
-                for func in node.functions:
-                    if symbol.lower() in func.get("name", "").lower():
-                        references.append({
-                            "type": "function",
-                            "file": node.path,
-                            "name": func["name"],
-                            "line": func.get("line"),
-                        })
-                
-                # Check classes
-                for cls in node.classes:
-                    if symbol.lower() in cls.get("name", "").lower():
-                        references.append({
-                            "type": "class",
-                            "file": node.path,
-                            "name": cls["name"],
-                            "line": cls.get("line"),
-                        })
-                
-                # Check imports
-                for imp in node.imports:
-                    if symbol.lower() in imp.lower():
-                        references.append({
-                            "type": "import",
-                            "file": node.path,
-                            "statement": imp,
-                        })
-            else:
-                for child in node.children:
-                    search_node(child)
-        
-        search_node(self.index.root)
-        return references
+        # The index's symbol table is built once and shared with CodeTree.find
+        return self.index.symbols.find(symbol)
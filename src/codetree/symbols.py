@@ -0,0 +1,156 @@
+"""Columnar symbol table for reference lookups."""
+
+import sys
+from array import array
+from typing import Optional
+
+from .indexer import CodeIndex, _iter_file_nodes
+
+# pyahocorasick is optional: it matches many symbols in one pass over the names
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Symbol kinds, stored as one byte per symbol
+FUNCTION, CLASS, IMPORT = 0, 1, 2
+KIND_NAMES = ("function", "class", "import")
+
+# Lookups answered by a linear scan before the trigram index is built; building
+# it costs about as much as a few dozen scans, so one-off lookups skip it
+TRIGRAM_INDEX_AFTER = 4
+
+
+class SymbolIndex:
+    """
+    Every function, class and import of a CodeIndex as a struct of arrays.
+
+    Symbol ``i`` is ``(kinds[i], names[i], file_ids[i], lines[i])``, where the
+    name of an import is its statement and a line of 0 means unknown. Paths
+    are stored once in the ``files`` table and names are interned, so repeated
+    identifiers share one string. Lookups narrow candidates with a trigram
+    index over the lowercased names, verify them with a substring check and
+    only build reference dicts for matches.
+    """
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.lines = array("i")
+        self.file_ids = array("I")
+        self.names: list[str] = []
+        self.lower_names: list[str] = []
+        self.files: list[str] = []  # file_id -> path
+        self._file_ids: dict[str, int] = {}
+        self._trigrams: Optional[dict[str, array]] = None  # trigram -> symbol ids
+        self._scans = 0
+
+    @classmethod
+    def from_index(cls, index: CodeIndex) -> "SymbolIndex":
+        """Build the symbol table from an index, in tree order."""
+        symbols = cls()
+        for node in _iter_file_nodes(index.root):
+            for func in node.functions:
+                symbols.add(FUNCTION, func.name, node.path, func.line)
+            for cls_ in node.classes:
+                symbols.add(CLASS, cls_.name, node.path, cls_.line)
+            for imp in node.imports:
+                symbols.add(IMPORT, imp, node.path)
+        return symbols
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def file_id(self, path: str) -> int:
+        """Get the id of a file path, adding it to the file table if new."""
+        file_id = self._file_ids.get(path)
+        if file_id is None:
+            file_id = self._file_ids[path] = len(self.files)
+            self.files.append(sys.intern(path))
+        return file_id
+
+    def add(self, kind: int, name: str, file: str, line: int | None = None) -> None:
+        """Append a symbol."""
+        name = sys.intern(name)
+        self.kinds.append(kind)
+        self.names.append(name)
+        self.lower_names.append(sys.intern(name.lower()))
+        self.file_ids.append(self.file_id(file))
+        self.lines.append(line or 0)
+        self._trigrams = None
+
+    def reference(self, i: int) -> dict:
+        """Materialize symbol ``i`` as a reference dict."""
+        kind = self.kinds[i]
+        path = self.files[self.file_ids[i]]
+        if kind == IMPORT:
+            return {"type": "import", "file": path, "statement": self.names[i]}
+        return {
+            "type": KIND_NAMES[kind],
+            "file": path,
+            "name": self.names[i],
+            "line": self.lines[i] or None,
+        }
+
+    def _trigram_index(self) -> dict[str, array]:
+        """Map each trigram of the lowercased names to the ids containing it."""
+        if self._trigrams is None:
+            trigrams: dict[str, array] = {}
+            for i, name in enumerate(self.lower_names):
+                for gram in {name[j:j + 3] for j in range(len(name) - 2)}:
+                    postings = trigrams.get(gram)
+                    if postings is None:
+                        postings = trigrams[gram] = array("I")
+                    postings.append(i)
+            self._trigrams = trigrams
+        return self._trigrams
+
+    def find(self, symbol: str) -> list[dict]:
+        """Find symbols whose name contains ``symbol`` (case-insensitive)."""
+        needle = symbol.lower()
+        if len(needle) < 3 or (self._trigrams is None and self._scans < TRIGRAM_INDEX_AFTER):
+            self._scans += 1
+            candidates = range(len(self.lower_names))
+        else:
+            # Every match contains all of the needle's trigrams, so scanning
+            # the shortest posting list is enough
+            trigrams = self._trigram_index()
+            candidates = None
+            for gram in {needle[j:j + 3] for j in range(len(needle) - 2)}:
+                postings = trigrams.get(gram)
+                if postings is None:
+                    return []
+                if candidates is None or len(postings) < len(candidates):
+                    candidates = postings
+
+        lower_names = self.lower_names
+        return [self.reference(i) for i in candidates if needle in lower_names[i]]
+
+    def find_many(self, symbols: list[str]) -> dict[str, list[dict]]:
+        """
+        Find references for several symbols at once.
+
+        Returns a dict mapping each symbol to what ``find`` returns for it.
+        With pyahocorasick installed, all symbols are matched in a single
+        pass over the names using an Aho-Corasick automaton.
+        """
+        needles: dict[str, list[str]] = {}  # lowercased needle -> symbols
+        for symbol in symbols:
+            needles.setdefault(symbol.lower(), []).append(symbol)
+        if ahocorasick is None or len(needles) < 2 or "" in needles:
+            return {symbol: self.find(symbol) for symbol in symbols}
+
+        automaton = ahocorasick.Automaton()
+        for needle in needles:
+            automaton.add_word(needle, needle)
+        automaton.make_automaton()
+
+        hits: dict[str, list[int]] = {needle: [] for needle in needles}
+        for i, name in enumerate(self.lower_names):
+            for needle in {needle for _, needle in automaton.iter(name)}:
+                hits[needle].append(i)
+
+        results = {}
+        for needle, originals in needles.items():
+            for symbol in originals:
+                results[symbol] = [self.reference(i) for i in hits[needle]]
+        return results
@@ -0,0 +1,34 @@
+"""Shared test fixtures."""
+
+import pytest
+from pathlib import Path
+from codetree.config import Config
+
+
+def make_repo(root: Path) -> Path:
+    """Create a small sample repository."""
+    (root / "pkg").mkdir()
+    (root / "pkg" / "auth.py").write_text(
+        'def login(user):\n    """Log a user in."""\n    pass\n\n'
+        "class Session:\n    pass\n"
+    )
+    (root / "pkg" / "db.py").write_text("import sqlite3\n\ndef connect():\n    pass\n")
+    (root / "main.js").write_text("function main() {}\n")
+    (root / "README.md").write_text("# Sample\n")
+    return root
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Default config with the cache directory inside tmp_path."""
+    config = Config()
+    config.cache_dir = tmp_path / "cache"
+    return config
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A small sample repository."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    return make_repo(repo)
@@ -0,0 +1,58 @@
+"""Tests for configuration loading."""
+
+from codetree.config import Config, LLMConfig
+
+
+class TestConfigLoad:
+    """Tests for Config.load."""
+
+    def test_load_explicit_path(self, tmp_path):
+        path = tmp_path / "config.yaml"
+        path.write_text("llm:\n  model: llama3\n  provider: ollama\nindex:\n  max_file_size: 10\n")
+
+        config = Config.load(path)
+
+        assert config.llm.provider == "ollama"
+        assert config.llm.model == "llama3"
+        assert config.index.max_file_size == 10
+
+    def test_load_falls_back_to_cwd_then_defaults(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("HOME", str(tmp_path))
+
+        assert Config.load(tmp_path / "missing.yaml").llm.model == "gpt-4o"
+
+        (tmp_path / ".codetree.yml").write_text("llm:\n  model: from-cwd\n")
+        assert Config.load(tmp_path / "missing.yaml").llm.model == "from-cwd"
+
+    def test_load_toml(self, tmp_path):
+        path = tmp_path / ".codetree.toml"
+        path.write_text('[llm]\nmodel = "llama3"\n\n[index]\nlanguages = ["go"]\n')
+
+        config = Config.load(path)
+
+        assert config.llm.model == "llama3"
+        assert config.index.languages == ["go"]
+
+
+class TestLLMConfig:
+    """Tests for LLMConfig environment handling."""
+
+    def test_env_var_references(self, monkeypatch):
+        monkeypatch.setenv("MY_KEY", "secret")
+        monkeypatch.setenv("OLLAMA_PORT", "11434")
+
+        config = LLMConfig(
+            provider="ollama",
+            api_key="${MY_KEY}",
+            base_url="http://localhost:${OLLAMA_PORT}",
+        )
+
+        assert config.api_key == "secret"
+        assert config.base_url == "http://localhost:11434"
+
+    def test_unset_env_var_falls_back_to_default_key(self, monkeypatch):
+        monkeypatch.delenv("MISSING_KEY", raising=False)
+        monkeypatch.setenv("OPENAI_API_KEY", "default")
+
+        assert LLMConfig(api_key="${MISSING_KEY}").api_key == "default"
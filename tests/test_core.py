@@ -0,0 +1,167 @@
+"""Tests for the CodeTree entry point."""
+
+import asyncio
+import json
+import os
+
+import pytest
+from codetree.core import CodeTree
+from codetree.llm import LLMClient
+from codetree.parser import PARSER_VERSION
+
+
+@pytest.fixture
+def tree(config, repo):
+    tree = CodeTree(repo, config=config)
+    tree.build_index()
+    return tree
+
+
+class TestFind:
+    """Tests for CodeTree.find."""
+
+    def test_find_function_and_class(self, tree):
+        refs = tree.find("login")
+        assert refs == [{"type": "function", "file": "pkg/auth.py", "name": "login", "line": 1}]
+        assert [r["name"] for r in tree.find("SESSION")] == ["Session"]
+
+    def test_find_import(self, tree):
+        assert tree.find("sqlite3") == [
+            {"type": "import", "file": "pkg/db.py", "statement": "import sqlite3"}
+        ]
+
+    def test_find_is_cached_until_rebuild(self, tree, monkeypatch):
+        tree.find("login")
+        monkeypatch.setattr(tree, "_find_references", lambda symbol: [])
+        assert len(tree.find("Login")) == 1
+
+        tree.build_index()
+        assert tree.find("login") == []
+
+    def test_find_cache_dropped_by_tree_changed(self, tree):
+        assert len(tree.find("login")) == 1
+        tree.index.root.children[0].children[0].functions[0].name = "sign_in"
+        tree.index.tree_changed()
+
+        assert tree.find("login") == []
+        assert tree.find("sign_in") == tree.find_many(["sign_in"])["sign_in"]
+
+    def test_find_results_do_not_share_cached_dicts(self, tree):
+        tree.find("login")[0]["name"] = "changed"
+        assert tree.find("login")[0]["name"] == "login"
+
+    def test_symbol_table_is_columnar(self, tree):
+        symbols = tree.symbols
+        assert len(symbols) == len(symbols.kinds) == len(symbols.lines) == len(symbols.file_ids)
+        assert symbols.names[:2] == ["login", "Session"]
+        assert symbols.file_ids[0] == symbols.file_ids[1]
+        assert symbols.files[symbols.file_ids[0]] == "pkg/auth.py"
+
+    def test_trigram_lookup_matches_scan(self, tree, monkeypatch):
+        monkeypatch.setattr("codetree.symbols.TRIGRAM_INDEX_AFTER", 0)
+        symbols = tree.symbols
+        assert [r["name"] for r in symbols.find("ssio")] == ["Session"]
+        assert symbols.find("sqlite3") == tree.find("SQLite3")
+        assert symbols.find("nomatch") == []
+
+    def test_find_many_matches_find(self, tree):
+        queries = ["login", "SESSION", "sqlite", "o", "nomatch", "login"]
+        results = tree.find_many(queries)
+        assert results == {q: tree.find(q) for q in queries}
+
+    def test_retriever_shares_symbol_table(self, tree):
+        tree.config.llm.provider = "ollama"
+        assert tree.retriever.find_references("login") == tree.find("login")
+        assert tree.index.symbols is tree.symbols
+
+
+class TestIncrementalBuild:
+    """Tests for CodeTree.build_index(incremental=True)."""
+
+    def test_unchanged_repo_keeps_saved_index(self, tree, config, repo, monkeypatch):
+        fresh = CodeTree(repo, config=config)
+        saved = fresh.index
+        monkeypatch.setattr(fresh.indexer, "save_index", None)  # must not be called
+
+        assert fresh.build_index(incremental=True) is saved
+
+    def test_touched_file_stat_is_saved(self, tree, config, repo):
+        db = repo / "pkg" / "db.py"
+        os.utime(db, ns=(db.stat().st_atime_ns, db.stat().st_mtime_ns + 10**9))
+
+        fresh = CodeTree(repo, config=config)
+        saved = fresh.index
+        assert fresh.build_index(incremental=True) is saved
+
+        node = CodeTree(repo, config=config).index.root.children[0].children[1]
+        assert node.mtime_ns == db.stat().st_mtime_ns
+
+    def test_changed_file_is_picked_up(self, tree, config, repo):
+        (repo / "pkg" / "db.py").write_text("def reconnect():\n    pass\n")
+
+        fresh = CodeTree(repo, config=config)
+        fresh.build_index(incremental=True)
+
+        assert fresh.find("reconnect")[0]["file"] == "pkg/db.py"
+        assert CodeTree(repo, config=config).find("reconnect")
+
+    def test_parser_change_replaces_saved_index(self, tree, config, repo):
+        tree.index.parser_version = "0"
+        tree.indexer.save_index(tree.index, tree._index_path)
+
+        fresh = CodeTree(repo, config=config)
+        saved = fresh.index
+        assert fresh.build_index(incremental=True) is not saved
+        assert CodeTree(repo, config=config).index.parser_version == PARSER_VERSION
+
+
+class FakeLLM(LLMClient):
+    """Points retrieval at pkg/auth.py and answers with the prompt's first line."""
+
+    def chat(self, messages, **kwargs):
+        if "relevant_files" in messages[0]["content"]:
+            return json.dumps({"relevant_files": [{"path": "pkg/auth.py"}]})
+        return messages[1]["content"].splitlines()[2]
+
+
+class TestQuery:
+    """Tests for the blocking, async and streaming query paths."""
+
+    @pytest.fixture
+    def tree(self, tree):
+        tree.config.llm.provider = "ollama"
+        tree.retriever.llm = FakeLLM()
+        return tree
+
+    def test_query_paths_agree(self, tree):
+        answer = tree.query("How do users log in?")
+
+        assert answer == "## File: pkg/auth.py"
+        assert asyncio.run(tree.query_async("How do users log in?")) == answer
+        assert "".join(tree.retriever.stream_query("How do users log in?")) == answer
+
+    def test_retrieval_is_cached_per_tree(self, tree, monkeypatch):
+        calls = []
+        chat = tree.retriever.llm.chat
+        monkeypatch.setattr(tree.retriever.llm, "chat", lambda m, **kw: calls.append(m) or chat(m))
+
+        tree.retriever.retrieve("How do users log in?")
+        tree.retriever.retrieve(" How do users log in? ")
+        assert len(calls) == 1
+
+        tree.index.root.children[0].name = "lib"
+        tree.index.tree_changed()
+        tree.retriever.retrieve("How do users log in?")
+        assert len(calls) == 2
+
+    def test_relevant_files_parsed_from_prose(self, tree):
+        response = (
+            'Files like {path} matter.\n```json\n{"relevant_files": [{"path": "a.py"}]}\n```\n'
+            'Also see {"relevant_files": []}.'
+        )
+        assert tree.retriever._parse_relevant_files(response, 5) == [{"path": "a.py"}]
+        assert tree.retriever._parse_relevant_files("no json {here", 5) == []
+
+    def test_abatch_keeps_order(self):
+        conversations = [[{"role": "user", "content": f"\n\n{i}"}] * 2 for i in range(3)]
+        assert asyncio.run(FakeLLM().abatch(conversations)) == ["0", "1", "2"]
@@ -0,0 +1,229 @@
+"""Tests for the code indexer."""
+
+import hashlib
+import shutil
+import subprocess
+
+import pytest
+from codetree.indexer import CodeIndexer
+from codetree.parser import PARSER_VERSION
+
+
+class TestCodeIndexer:
+    """Tests for CodeIndexer class."""
+
+    def test_build_index(self, config, repo):
+        index = CodeIndexer(config).build_index(repo)
+
+        assert index.total_files == 3
+        assert index.languages == {"python": 2, "javascript": 1}
+        pkg = index.root.children[0]
+        assert pkg.type == "directory" and pkg.name == "pkg"
+        assert [c.name for c in pkg.children] == ["auth.py", "db.py"]
+        assert pkg.children[0].functions[0].name == "login"
+
+    def test_skips_by_extension_and_size(self, config, repo):
+        config.index.max_file_size = 1000
+        (repo / "big.py").write_text("x = 1\n" * 1000)
+        indexer = CodeIndexer(config)
+        index = indexer.build_index(repo)
+
+        assert "README.md" not in indexer._list_candidates(repo)
+        assert index.total_files == 3
+
+    def test_exclude_globs(self, config, repo):
+        config.index.exclude = ["*.js", "pkg/db.py"]
+        index = CodeIndexer(config).build_index(repo)
+        assert index.total_files == 1
+        assert index.root.children[0].children[0].path == "pkg/auth.py"
+
+    def test_compact_tree_depth(self, config, repo):
+        index = CodeIndexer(config).build_index(repo)
+
+        assert index.get_compact_tree(0) == "repo/"
+        assert index.get_compact_tree(1).splitlines() == [
+            "repo/", "  pkg/", "  main.js [javascript]", "    → functions: main",
+        ]
+        lines = index.get_compact_tree(2).splitlines()
+        assert lines[1:4] == ["  pkg/", "    auth.py [python]", "      → functions: login"]
+        assert lines[-2:] == ["  main.js [javascript]", "    → functions: main"]
+
+    def test_compact_tree_cached(self, config, repo):
+        index = CodeIndexer(config).build_index(repo)
+        tree = index.get_compact_tree(2)
+        assert index.get_compact_tree(2) is tree
+
+        index.root.children[0].name = "lib"
+        assert index.get_compact_tree(2) is tree
+        index.tree_changed()
+        assert "  lib/" in index.get_compact_tree(2).splitlines()
+
+    def test_parse_cache_reused(self, config, repo, monkeypatch):
+        first = CodeIndexer(config).build_index(repo)
+
+        indexer = CodeIndexer(config)
+        def fail(*args, **kwargs):
+            raise AssertionError("file should come from the parse cache")
+        monkeypatch.setattr(indexer.parser, "parse_file", fail)
+        second = indexer.build_index(repo)
+
+        assert second.root.to_dict() == first.root.to_dict()
+
+    def test_parse_cache_invalidated_on_change(self, config, repo):
+        CodeIndexer(config).build_index(repo)
+        (repo / "pkg" / "db.py").write_text("def reconnect():\n    pass\n")
+
+        index = CodeIndexer(config).build_index(repo)
+        db = index.root.children[0].children[1]
+        assert [f.name for f in db.functions] == ["reconnect"]
+
+    def test_parse_cache_keeps_other_versions(self, config, repo, monkeypatch):
+        CodeIndexer(config).build_index(repo)
+        cache_root = config.cache_dir / "parse-cache"
+        entries = set(cache_root.rglob("*.pkl"))
+
+        monkeypatch.setattr("codetree.cache.PARSER_VERSION", "0")
+        CodeIndexer(config).build_index(repo)
+
+        assert entries and entries < set(cache_root.rglob("*.pkl"))
+
+    def test_parse_cache_disabled(self, config, repo):
+        config.index.parse_cache = False
+        CodeIndexer(config).build_index(repo)
+        assert not (config.cache_dir / "parse-cache").exists()
+
+    def test_incremental_reuses_unchanged_files(self, config, repo, monkeypatch):
+        config.index.parse_cache = False
+        indexer = CodeIndexer(config)
+        first = indexer.build_index(repo)
+        root_hash = first.root.content_hash
+        (repo / "pkg" / "db.py").write_text("def reconnect():\n    pass\n")
+
+        parsed = []
+        original = indexer.parser.parse_file
+        def tracking(file_path, content=None):
+            parsed.append(file_path.name)
+            return original(file_path, content)
+        monkeypatch.setattr(indexer.parser, "parse_file", tracking)
+        second = indexer.build_index(repo, previous=first)
+
+        assert parsed == ["db.py"]
+        assert second.root.children[0].children[0] is first.root.children[0].children[0]
+        db = second.root.children[0].children[1]
+        assert db.content_hash == hashlib.sha256(b"def reconnect():\n    pass\n").hexdigest()
+        assert second.root.content_hash != root_hash
+
+    def test_incremental_reparses_after_parser_change(self, config, repo, monkeypatch):
+        config.index.parse_cache = False
+        indexer = CodeIndexer(config)
+        first = indexer.build_index(repo)
+        first.parser_version = "0"
+
+        parsed = []
+        original = indexer.parser.parse_file
+        def tracking(file_path, content=None):
+            parsed.append(file_path.name)
+            return original(file_path, content)
+        monkeypatch.setattr(indexer.parser, "parse_file", tracking)
+        second = indexer.build_index(repo, previous=first)
+
+        assert len(parsed) == first.total_files
+        assert second.parser_version == PARSER_VERSION
+
+    def test_unchanged_repo_has_same_root_hash(self, config, repo):
+        indexer = CodeIndexer(config)
+        first = indexer.build_index(repo)
+        (repo / "pkg" / "db.py").touch()
+        second = indexer.build_index(repo, previous=first)
+        assert second.root.content_hash == first.root.content_hash
+
+    def test_save_load_json(self, config, repo, tmp_path):
+        indexer = CodeIndexer(config)
+        index = indexer.build_index(repo)
+        indexer.save_index(index, tmp_path / "index.json")
+
+        assert (tmp_path / "index.json").read_bytes() == index.to_json().encode("utf-8")
+        loaded = indexer.load_index(tmp_path / "index.json")
+        assert loaded.to_dict() == index.to_dict()
+
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_save_load_binary(self, config, repo, tmp_path, monkeypatch, compress):
+        if compress:
+            pytest.importorskip("zstandard")
+        else:
+            monkeypatch.setattr("codetree.indexer.zstandard", None)
+        indexer = CodeIndexer(config)
+        index = indexer.build_index(repo)
+        indexer.save_index(index, tmp_path / "index.bin")
+
+        loaded = indexer.load_index(tmp_path / "index.bin")
+        assert loaded.to_dict() == index.to_dict()
+
+    def test_binary_index_builds_directories_lazily(self, config, repo, tmp_path):
+        indexer = CodeIndexer(config)
+        indexer.save_index(indexer.build_index(repo), tmp_path / "index.bin")
+        loaded = indexer.load_index(tmp_path / "index.bin")
+
+        pkg = loaded.root.children[0]
+        assert pkg._reader is not None
+        assert [c.name for c in pkg.children] == ["auth.py", "db.py"]
+        assert pkg._reader is None
+        assert pkg.children[0].functions[0].name == "login"
+
+    def test_binary_index_equals_built_tree(self, config, repo, tmp_path):
+        indexer = CodeIndexer(config)
+        index = indexer.build_index(repo)
+        indexer.save_index(index, tmp_path / "index.bin")
+        loaded = indexer.load_index(tmp_path / "index.bin")
+
+        assert loaded.root == index.root
+        assert index.root == loaded.root
+
+    def test_save_load_compressed_json(self, config, repo, tmp_path):
+        pytest.importorskip("zstandard")
+        indexer = CodeIndexer(config)
+        index = indexer.build_index(repo)
+        indexer.save_index(index, tmp_path / "index.json.zst")
+        indexer.save_index(index, tmp_path / "index.json.zst")  # replaces the first save
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "index.json.zst", "repo"]
+        loaded = indexer.load_index(tmp_path / "index.json.zst")
+        assert loaded.to_dict() == index.to_dict()
+
+    def test_batched_stat_matches_sequential(self, config, repo, monkeypatch):
+        expected = CodeIndexer(config).build_index(repo)
+        monkeypatch.setattr("codetree.indexer.STAT_BATCH_SIZE", 1)
+        index = CodeIndexer(config).build_index(repo)
+        assert index.root.to_dict() == expected.root.to_dict()
+
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+    def test_git_checkout_respects_gitignore(self, config, repo):
+        subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+        (repo / ".gitignore").write_text("generated.py\n")
+        (repo / "generated.py").write_text("def generated():\n    pass\n")
+        (repo / "dist").mkdir()
+        (repo / "dist" / "bundle.js").write_text("function bundle() {}\n")
+
+        index = CodeIndexer(config).build_index(repo)
+
+        assert index.total_files == 3
+        assert [c.name for c in index.root.children] == ["pkg", "main.js"]
+
+    def test_parallel_parse_matches_sequential(self, config, repo, monkeypatch):
+        config.index.parse_cache = False
+        expected = CodeIndexer(config).build_index(repo)
+        config.index.parse_workers = 2
+        monkeypatch.setattr("codetree.parser.PARALLEL_PARSE_THRESHOLD", 1)
+        index = CodeIndexer(config).build_index(repo)
+        assert index.root.to_dict() == expected.root.to_dict()
+
+    def test_parallel_parse_falls_back_without_process_pool(self, config, repo, monkeypatch):
+        config.index.parse_cache = False
+        expected = CodeIndexer(config).build_index(repo)
+        config.index.parse_workers = 2
+        monkeypatch.setattr("codetree.parser.PARALLEL_PARSE_THRESHOLD", 1)
+        def unavailable(*args, **kwargs):
+            raise OSError("no semaphores")
+        monkeypatch.setattr("codetree.parser.ProcessPoolExecutor", unavailable)
+        index = CodeIndexer(config).build_index(repo)
+        assert index.root.to_dict() == expected.root.to_dict()
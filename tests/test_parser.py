@@ -42,12 +42,14 @@ async def fetch_data(url: str) -> dict:
 def decorated():
     pass
 '''
-        result = self.parser._parse_python(Path("test.py"), content, content.split("\n"))
+        result = self.parser._parse_python(Path("test.py"), content)
         
         assert len(result.functions) == 3
         assert result.functions[0].name == "hello"
         assert result.functions[1].name == "fetch_data"
         assert result.functions[2].name == "decorated"
+        assert result.functions[0].decorators is None
+        assert result.functions[2].decorators == ["@decorator"]
     
     def test_parse_python_classes(self):
         content = '''
@@ -62,7 +64,7 @@ class ChildClass(ParentClass):
 class DataClass:
     pass
 '''
-        result = self.parser._parse_python(Path("test.py"), content, content.split("\n"))
+        result = self.parser._parse_python(Path("test.py"), content)
         
         assert len(result.classes) == 3
         assert result.classes[0].name == "MyClass"
@@ -76,12 +78,58 @@ import sys
 from pathlib import Path
 from typing import Optional, List
 '''
-        result = self.parser._parse_python(Path("test.py"), content, content.split("\n"))
+        result = self.parser._parse_python(Path("test.py"), content)
         
         assert len(result.imports) == 4
         assert "import os" in result.imports
         assert "from pathlib import Path" in result.imports
 
+    
+    def test_parse_java_skips_keywords(self):
+        content = """public class Box {
+    public int get(boolean ok) {
+        if (ok) log(); else return (value);
+        return value;
+    }
+}
+"""
+        result = self.parser._parse_java(Path("Box.java"), content)
+        
+        assert [c.name for c in result.classes] == ["Box"]
+        assert [f.name for f in result.functions] == ["get"]
+        assert result.functions[0].start_line == 2
+    
+    def test_parse_java_unclosed_paren_keeps_classes(self):
+        content = """// call helper(see below
+
+public class Real {
+    public int get() { return 1; }
+}
+"""
+        result = self.parser._parse_java(Path("Real.java"), content)
+        
+        assert [(c.name, c.start_line) for c in result.classes] == [("Real", 3)]
+    
+    def test_parse_file_reads_and_skips_large_files(self, tmp_path):
+        path = tmp_path / "mod.py"
+        path.write_bytes(b"def main():\r\n    pass\r\n")
+        
+        result = self.parser.parse_file(path)
+        assert result.functions[0].name == "main"
+        assert result.line_count == 3
+        assert CodeParser(max_file_size=10).parse_file(path) is None
+    
+    def test_parse_files_in_pool_matches_parse_file(self, tmp_path, monkeypatch):
+        paths = []
+        for i in range(4):
+            paths.append(tmp_path / f"mod{i}.py")
+            paths[-1].write_text(f"def func{i}():\n    pass\n")
+        monkeypatch.setattr("codetree.parser.PARALLEL_PARSE_THRESHOLD", 1)
+        
+        expected = [self.parser.parse_file(path) for path in paths]
+        assert self.parser.parse_files(paths, workers=2) == expected
+        assert self.parser.parse_files(paths[:1], [b"class A:\n    pass\n"])[0].classes[0].name == "A"
+
 
 class TestLanguageExtensions:
     """Tests for language extension mappings."""